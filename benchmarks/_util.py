@@ -0,0 +1,39 @@
+"""
+Helpers shared by the benchmark scripts. Importing this module puts the checkout holding it first on the path,
+so that the scripts, run as python benchmarks/bench_*.py from anywhere, time the jsondiff of the checkout
+rather than an installed one.
+"""
+import os
+import sys
+import time
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def report(label, seconds, details=''):
+    print(f'{label:<28} {seconds * 1e3:10.1f} ms{details}')
+
+
+def bench(label, fn, number=None, repeat=5, setup='pass', memory=False):
+    """
+    Prints the time a single call of fn takes in ms, with the peak memory it allocates if memory is set. With
+    number, prints the time per call in us of the fastest of repeat runs of number calls, setup being run
+    before each.
+    """
+    if number is not None:
+        t = min(timeit.repeat(fn, setup, number=number, repeat=repeat)) / number
+        print(f'{label:<28} {t * 1e6:12.1f} us')
+        return
+    if memory:
+        tracemalloc.start()
+    t = time.perf_counter()
+    fn()
+    t = time.perf_counter() - t
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        report(label, t, f' {peak / 2 ** 20:10.1f} MB')
+    else:
+        report(label, t)
@@ -0,0 +1,71 @@
+"""
+Measures the longest time the event loop is blocked while diffing a large structure with diff, and with adiff
+for a few yield_every and time_slice settings, along with the time the diff takes.
+
+    python benchmarks/bench_async.py [count]
+"""
+import asyncio
+import random
+import sys
+import time
+
+from _util import report
+
+import jsondiff
+from jsondiff import JsonDiffer
+
+
+def documents(rng, n):
+    a = {f'r{i}': {'id': i, 'values': [rng.random() for _ in range(20)]} for i in range(n)}
+    b = {k: {'id': v['id'], 'values': [x if rng.random() < 0.9 else rng.random() for x in v['values']]}
+         for k, v in a.items()}
+    return a, b
+
+
+async def blocked(coro):
+    """
+    Runs coro alongside a task measuring the longest gap between its turns on the loop.
+    """
+    longest = 0.0
+
+    async def ticker():
+        nonlocal longest
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            longest = max(longest, now - last)
+            last = now
+
+    task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    t = time.perf_counter()
+    try:
+        await coro
+        t = time.perf_counter() - t
+        # the ticker's turn after the coroutine ends
+        await asyncio.sleep(0)
+    finally:
+        task.cancel()
+    return t, longest
+
+
+async def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    a, b = documents(random.Random(0), n)
+    differ = JsonDiffer()
+
+    async def blocking():
+        differ.diff(a, b)
+
+    runs = [('diff', blocking())]
+    for yield_every in (100, 1000):
+        runs.append((f'adiff yield_every={yield_every}', differ.adiff(a, b, yield_every=yield_every)))
+    runs.append(('adiff time_slice=1ms', jsondiff.adiff(a, b, yield_every=10 ** 9, time_slice=0.001)))
+    for label, coro in runs:
+        t, longest = await blocked(coro)
+        report(label, t, f', loop blocked up to {longest * 1e3:8.2f} ms')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,37 @@
+"""
+Times loading and dumping a large JSON document with each available JSON backend, and diffing two large JSON
+texts with load and dump using each.
+
+    python benchmarks/bench_backends.py [count]
+"""
+import random
+import sys
+
+from _util import bench
+
+import jsondiff
+from jsondiff import JsonDiffer, JsonDumper, JsonLoader
+
+
+def documents(rng, n):
+    a = {f'r{i}': {'id': i, 'name': f'item {i}', 'values': [rng.random() for _ in range(10)]} for i in range(n)}
+    b = dict(a, **{f'r{i}': {'id': i, 'name': 'changed', 'values': []} for i in rng.sample(range(n), n // 100)})
+    return a, b
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    a, b = documents(random.Random(0), n)
+    text_a, text_b = JsonDumper()(a), JsonDumper()(b)
+    data = text_a.encode()
+    for name in jsondiff.json_backends:
+        loader, dumper = JsonLoader(name), JsonDumper(name)
+        bench(f'{name} load str', lambda: loader(text_a))
+        bench(f'{name} load bytes', lambda: loader(data))
+        bench(f'{name} dump', lambda: dumper(a))
+        differ = JsonDiffer(load=True, dump=True, loader=loader, dumper=dumper)
+        bench(f'{name} diff', lambda: differ.diff(text_a, text_b))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Times diffing many small document pairs with the module-level diff, which builds a differ per pair, against
+JsonDiffer.diff_many, serially and on thread and process pools.
+
+    python benchmarks/bench_batch.py [count] [workers]
+"""
+import concurrent.futures
+import os
+import random
+import sys
+
+from _util import bench
+
+import jsondiff
+from jsondiff import JsonDiffer
+
+
+def documents(rng, n):
+    pairs = []
+    for i in range(n):
+        a = {'id': i, 'tags': [f't{rng.randrange(20)}' for _ in range(5)], 'score': rng.random()}
+        b = dict(a, score=rng.random()) if rng.random() < 0.5 else dict(a, tags=a['tags'][1:])
+        pairs.append((a, b))
+    return pairs
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    pairs = documents(random.Random(0), n)
+    differ = JsonDiffer(syntax='symmetric')
+    bench('diff per pair', lambda: [jsondiff.diff(a, b, syntax='symmetric') for a, b in pairs])
+    bench('diff_many', lambda: list(differ.diff_many(pairs)))
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        bench(f'diff_many, {workers} threads', lambda: list(differ.diff_many(pairs, executor=pool)))
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        bench(f'diff_many, {workers} processes', lambda: list(differ.diff_many(pairs, executor=pool, chunksize=1000)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Times and measures the peak memory of diffing two large, mostly identical JSON files with diff_files, which parses
+only the top-level items that differ, against loading both files and diffing them.
+
+    python benchmarks/bench_files.py [count]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+
+from _util import bench
+
+from jsondiff import JsonDiffer
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rng = random.Random(0)
+    # a snapshot of independent entries, a few of which change
+    a = {f'r{i}': {'id': i, 'values': [rng.random() for _ in range(10)]} for i in range(n)}
+    b = dict(a)
+    for k in rng.sample(sorted(a), 3):
+        b[k] = {'id': -1}
+    differ = JsonDiffer(syntax='symmetric', marshal=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, doc in (('a.json', a), ('b.json', b), ('c.json', a)):
+            paths.append(os.path.join(tmp, name))
+            with open(paths[-1], 'w') as f:
+                json.dump(doc, f)
+        del a, b
+
+        def loaded(first, second):
+            with open(first) as fa, open(second) as fb:
+                differ.diff(json.load(fa), json.load(fb))
+
+        bench('load, diff', lambda: loaded(paths[0], paths[1]), memory=True)
+        bench('diff_files', lambda: differ.diff_files(paths[0], paths[1]), memory=True)
+        bench('load, diff identical', lambda: loaded(paths[0], paths[2]), memory=True)
+        bench('diff_files identical', lambda: differ.diff_files(paths[0], paths[2]), memory=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Times marshaled diffs, escaped as they are emitted, against diffs marshaled by a second pass, and patches with
+marshaled diffs, unescaped as needed, against patches with diffs unmarshaled by a first pass, on documents with
+bulky inserted and replaced payloads.
+
+    python benchmarks/bench_marshal.py [count]
+"""
+import random
+import sys
+
+from _util import bench
+
+from jsondiff import JsonDiffer
+
+
+def payload(rng, i):
+    return {
+        'id': i,
+        'name': f'item{i}',
+        'price': {'$currency': 'EUR', 'amount': rng.random()} if i % 10 == 0 else rng.random(),
+        'tags': [f'tag{rng.randrange(20)}' for _ in range(10)],
+        'history': [{'ts': j, 'value': rng.random()} for j in range(10)],
+    }
+
+
+def documents(rng, n):
+    a = {'items': [payload(rng, i) for i in range(n)], 'meta': {'version': 1}}
+    b = {
+        'items': a['items'] + [payload(rng, n + i) for i in range(n)],
+        'meta': {'version': 2, 'replaced': [payload(rng, -i) for i in range(n // 10)]},
+    }
+    return a, b
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    a, b = documents(random.Random(0), n)
+    for syntax in ('compact', 'symmetric'):
+        differ = JsonDiffer(syntax=syntax)
+        marshaling = JsonDiffer(syntax=syntax, marshal=True)
+        assert marshaling.diff(a, b) == differ.marshal(differ.diff(a, b))
+        bench(f'{syntax} diff', lambda: differ.diff(a, b), 3)
+        bench(f'{syntax} diff, marshal', lambda: differ.marshal(differ.diff(a, b)), 3)
+        bench(f'{syntax} marshaled diff', lambda: marshaling.diff(a, b), 3)
+        md = marshaling.diff(a, b)
+        assert marshaling.patch(a, md) == b
+        bench(f'{syntax} unmarshal, patch', lambda: differ.patch(a, differ.unmarshal(md)), 3)
+        bench(f'{syntax} marshaled patch', lambda: marshaling.patch(a, md), 3)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,32 @@
+"""
+Times diffing a large dict of independent entries serially and with worker processes.
+
+    python benchmarks/bench_parallel.py [count] [workers]
+"""
+import os
+import random
+import sys
+
+from _util import bench
+
+from jsondiff import JsonDiffer
+
+
+def documents(rng, n):
+    a = {f'r{i}': {'id': i, 'values': [rng.random() for _ in range(50)]} for i in range(n)}
+    b = {k: {'id': v['id'], 'values': [x if rng.random() < 0.5 else rng.random() for x in v['values']]}
+         for k, v in a.items()}
+    return a, b
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    a, b = documents(random.Random(0), n)
+    differ = JsonDiffer()
+    for label, w in (('serial', None), (f'{workers} workers', workers)):
+        bench(label, lambda: differ.diff(a, b, workers=w))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Times applying a small patch to a large document, copying the changed containers or modifying the document in
+place, applying many list edits to a large array, in one pass or one by one, and applying one marshaled diff to
+many copies of a configuration, by patch or by a compiled program.
+
+    python benchmarks/bench_patch.py [size]
+"""
+import copy
+import random
+import sys
+
+from _util import bench
+
+from jsondiff import JsonDiffer, delete, insert
+
+
+def document(n):
+    return {
+        'records': {f'r{i}': {'id': i, 'tags': list(range(10))} for i in range(n)},
+        'log': list(range(n)),
+    }
+
+
+def config(rng, tenant):
+    return {
+        'tenant': tenant,
+        'features': {f'f{i}': rng.random() < 0.5 for i in range(50)},
+        'limits': {f'l{i}': {'soft': rng.randrange(100), 'hard': rng.randrange(1000)} for i in range(30)},
+        'routes': [{'path': f'/r{i}', 'upstream': f'u{rng.randrange(5)}'} for i in range(20)],
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    a = document(n)
+    b = copy.deepcopy(a)
+    b['records']['r7']['tags'][3] = 'changed'
+    b['log'].append(n)
+    for syntax in ('compact', 'symmetric'):
+        differ = JsonDiffer(syntax=syntax)
+        d = differ.diff(a, b)
+        # patched documents are kept alive so that freeing them is not timed
+        docs, done = [], []
+
+        def setup():
+            docs.append(copy.deepcopy(a))
+
+        bench(f'{syntax} patch', lambda: done.append(differ.patch(a, d)), number=1, repeat=20)
+        bench(f'{syntax} patch inplace', lambda: done.append(differ.patch(docs.pop(), d, inplace=True)),
+              number=1, repeat=5, setup=setup)
+        done.clear()
+
+    array = list(range(n))
+    d = {
+        delete: list(range(n - 1, -1, -10)),
+        insert: [(i, -i) for i in range(0, n, 10)],
+    }
+    compact = JsonDiffer()
+
+    def one_by_one():
+        b = list(array)
+        for pos in d[delete]:
+            b.pop(pos)
+        for pos, value in d[insert]:
+            b.insert(pos, value)
+        return b
+
+    assert compact.patch(array, d) == one_by_one()
+    bench(f'{n // 10} list edits', lambda: compact.patch(array, d), number=1, repeat=5)
+    bench(f'{n // 10} list edits one by one', one_by_one, number=1, repeat=5)
+
+    rng = random.Random(0)
+    tenants = [config(rng, t) for t in range(1000)]
+    new = copy.deepcopy(tenants[0])
+    new['features'].update({f'f{i}': True for i in range(0, 50, 5)})
+    new['limits'].update({f'l{i}': {'soft': 1, 'hard': 2} for i in range(0, 30, 3)})
+    del new['routes'][3:6]
+    new['routes'].insert(0, {'path': '/health', 'upstream': 'local'})
+    for syntax in ('compact', 'symmetric'):
+        differ = JsonDiffer(syntax=syntax, marshal=True)
+        d = differ.diff(tenants[0], new)
+        program = differ.compile_patch(d)
+        assert all(differ.patch(t, d) == program.apply(t) for t in tenants)
+        bench(f'{syntax} patch x{len(tenants)}', lambda: [differ.patch(t, d) for t in tenants], number=1, repeat=5)
+        bench(f'{syntax} program x{len(tenants)}', lambda: [program.apply(t) for t in tenants], number=1, repeat=5)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Times and measures the peak memory of writing the changes between two large documents as they are found, against
+building their diff and dumping it, and of comparing two large JSON files as they are read, against only loading
+them (aligning the loaded arrays would take quadratic time).
+
+    python benchmarks/bench_stream.py [count]
+"""
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+
+from _util import bench
+
+from jsondiff import JsonDiffer
+
+
+def documents(rng, n):
+    a = {f'r{i}': {'id': i, 'values': [rng.random() for _ in range(10)]} for i in range(n)}
+    b = {k: {'id': v['id'], 'values': [x if rng.random() < 0.5 else rng.random() for x in v['values']]}
+         for k, v in a.items()}
+    return a, b
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(0)
+    a, b = documents(rng, n)
+    differ = JsonDiffer(syntax='symmetric', dump=True)
+    # the output is discarded as it is written, as when piped to another process
+    sink = io.TextIOWrapper(io.BufferedWriter(io.FileIO(os.devnull, 'w')))
+    bench('diff, dump', lambda: differ.diff(a, b, sink), memory=True)
+    bench('write changes', lambda: differ.write_changes(a, b, sink), memory=True)
+
+    # mostly identical exports: a few records modified, one removed and one added
+    records = [{'id': i, 'name': f'item{i}', 'values': [rng.random() for _ in range(10)]} for i in range(20 * n)]
+    modified = [dict(r, name='changed') if r['id'] % 1000 == 0 else r for r in records]
+    del modified[len(modified) // 2]
+    modified.append({'id': -1})
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for name, doc in (('a.json', {'records': records}), ('b.json', {'records': modified})):
+            paths.append(os.path.join(tmp, name))
+            with open(paths[-1], 'w') as f:
+                json.dump(doc, f)
+        del records, modified
+
+        def loaded():
+            with open(paths[0]) as fa, open(paths[1]) as fb:
+                json.load(fa), json.load(fb)
+
+        def streamed():
+            with open(paths[0]) as fa, open(paths[1]) as fb:
+                differ.write_changes(fa, fb, sink, stream=True)
+
+        bench('load', loaded, memory=True)
+        bench('stream, write changes', streamed, memory=True)
+
+
+if __name__ == '__main__':
+    main()
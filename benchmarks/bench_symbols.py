@@ -0,0 +1,39 @@
+"""
+Times patching with and unmarshalling diffs made mostly of symbols: many small dicts, lists and sets, each with
+its own deletions, insertions, additions or discards.
+
+    python benchmarks/bench_symbols.py [count]
+"""
+import sys
+
+from _util import bench
+
+from jsondiff import JsonDiffer
+
+
+def documents(n):
+    a = {
+        f'd{i}': {'keep': i, 'drop': i, 'list': [i, i + 1, i + 2], 'set': {i, i + 1}}
+        for i in range(n)
+    }
+    b = {
+        f'd{i}': {'keep': i, 'new': i, 'list': [i - 1, i, i + 2], 'set': {i, i + 2}}
+        for i in range(n)
+    }
+    return a, b
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    a, b = documents(n)
+    for syntax in ('compact', 'symmetric'):
+        differ = JsonDiffer(syntax=syntax)
+        d = differ.diff(a, b)
+        md = differ.marshal(d)
+        assert differ.patch(a, d) == b
+        bench(f'{syntax} patch', lambda: differ.patch(a, d), 10)
+        bench(f'{syntax} unmarshal', lambda: differ.unmarshal(md), 10)
+
+
+if __name__ == '__main__':
+    main()
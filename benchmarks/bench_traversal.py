@@ -0,0 +1,68 @@
+"""
+Times diff, patch, unpatch, marshal and unmarshal on a wide document (many small containers) and on a deeply
+nested one.
+
+    python benchmarks/bench_traversal.py [depth]
+
+The depth defaults to 100, within the default recursion limit, so that the numbers can be compared with
+recursive implementations.
+"""
+import random
+import sys
+
+from _util import bench
+
+from jsondiff import JsonDiffer
+
+
+def wide_document(rng, n=2000):
+    return {
+        f'item{i}': {
+            'id': i,
+            'name': f'name{rng.randrange(100)}',
+            'tags': [rng.randrange(10) for _ in range(5)],
+            'meta': {'score': rng.random(), 'flags': {'a': rng.random() < 0.5, 'b': None}},
+        }
+        for i in range(n)
+    }
+
+
+def mutate(rng, o):
+    if isinstance(o, dict):
+        return {k: mutate(rng, v) if rng.random() < 0.9 else rng.random() for k, v in o.items()}
+    if isinstance(o, list):
+        return [mutate(rng, x) for x in o if rng.random() < 0.9]
+    return o if rng.random() < 0.9 else rng.random()
+
+
+def deep_document(depth, leaf):
+    o = {'leaf': leaf, 'items': [1, 2, 3]}
+    for i in range(depth):
+        o = {'level': i, 'child': o} if i % 2 else {'level': i, 'children': [o, '$escaped']}
+    return o
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    rng = random.Random(0)
+    wide_a = wide_document(rng)
+    wide_b = mutate(rng, wide_a)
+    deep_a = deep_document(depth, 1)
+    deep_b = deep_document(depth, 2)
+    compact = JsonDiffer()
+    symmetric = JsonDiffer(syntax='symmetric')
+
+    for name, a, b, number in (('wide', wide_a, wide_b, 5), (f'deep ({depth})', deep_a, deep_b, 20)):
+        d = compact.diff(a, b)
+        sd = symmetric.diff(a, b)
+        md = compact.marshal(sd)
+        bench(f'{name} diff', lambda: compact.diff(a, b), number, repeat=3)
+        bench(f'{name} similarity', lambda: compact.similarity(a, b), number, repeat=3)
+        bench(f'{name} patch', lambda: compact.patch(a, d), number, repeat=3)
+        bench(f'{name} unpatch', lambda: symmetric.unpatch(b, sd), number, repeat=3)
+        bench(f'{name} marshal', lambda: compact.marshal(sd), number, repeat=3)
+        bench(f'{name} unmarshal', lambda: compact.unmarshal(md), number, repeat=3)
+
+
+if __name__ == '__main__':
+    main()
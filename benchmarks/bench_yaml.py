@@ -0,0 +1,39 @@
+"""
+Times loading and dumping a multi-document YAML stream, like a set of Kubernetes manifests, with the pure Python
+and, when PyYAML is built with libyaml, the C implementations of YamlLoader and YamlDumper.
+
+    python benchmarks/bench_yaml.py [count]
+"""
+import random
+import sys
+
+from _util import bench
+
+import jsondiff
+from jsondiff import YamlDumper, YamlLoader
+
+
+def manifests(rng, n):
+    return [{'apiVersion': 'apps/v1', 'kind': 'Deployment',
+             'metadata': {'name': f'app-{i}', 'labels': {'app': f'app-{i}', 'tier': rng.choice(['web', 'db'])}},
+             'spec': {'replicas': rng.randrange(1, 5),
+                      'template': {'spec': {'containers': [{'name': 'main', 'image': f'registry/app:{i}',
+                                                            'ports': [{'containerPort': 8080}],
+                                                            'env': [{'name': f'K{j}', 'value': str(j)}
+                                                                    for j in range(5)]}]}}}}
+            for i in range(n)]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    docs = manifests(random.Random(0), n)
+    stream = '---\n'.join(YamlDumper(sort_keys=False)(doc) for doc in docs)
+    print(f'default implementation: {jsondiff.yaml_implementation}')
+    for libyaml in ([False, True] if jsondiff.yaml_implementation == 'libyaml' else [False]):
+        loader, dumper = YamlLoader(libyaml, multi_document=True), YamlDumper(libyaml)
+        bench(f'{loader.implementation} load', lambda: loader(stream))
+        bench(f'{dumper.implementation} dump', lambda: [dumper(doc) for doc in docs])
+
+
+if __name__ == '__main__':
+    main()
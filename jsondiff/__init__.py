@@ -1,37 +1,238 @@
+import asyncio
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import copy
+import functools
+import heapq
+import itertools
 import json
+import mmap
+import pickle
+import re
+import time
 import yaml
 
 from json import JSONDecodeError
+from json.decoder import WHITESPACE as _WHITESPACE
 from yaml import YAMLError
 
 from .symbols import *
 from .symbols import Symbol
 from ._version import __version__
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
 # rules
 # - keys and strings which start with $ (or specified escape_str) are escaped to $$ (or escape_str * 2)
 # - when source is dict and diff is a dict -> patch
 # - when source is list and diff is a list patch dict -> patch
 # - else -> replacement
 
+# digits mapped to 0, to find runs of them long enough for an integer beyond 64 bits (from 19 digits, which is
+# below -2 ** 63 when negative), which faster parsers turn into floats or reject, as a plain search (the re
+# module backtracks at every digit)
+_ZERO_DIGITS = str.maketrans('123456789', '000000000')
+_ZERO_DIGITS_BYTES = bytes.maketrans(b'123456789', b'000000000')
+
+
+def _plain_json(s, kwargs):
+    """
+    Tells whether the JSON document s can be handed to a faster parser than json: no json.loads options are
+    given and it holds no integer beyond 64 bits, only the fractions and exponents of floats being that long.
+    """
+    if kwargs:
+        return False
+    if isinstance(s, str):
+        digits, run, fractional = s.translate(_ZERO_DIGITS), '0' * 19, '.eE+'
+    else:
+        digits, run, fractional = s.translate(_ZERO_DIGITS_BYTES), b'0' * 19, b'.eE+'
+    pos = digits.find(run)
+    while pos >= 0:
+        if pos == 0 or s[pos - 1] not in fractional:
+            return False
+        pos += len(run)
+        while digits[pos:pos + 1] == run[:1]:
+            pos += 1
+        pos = digits.find(run, pos)
+    return True
+
+
+class JsonBackend:
+    """
+    A JSON parser and serializer for JsonLoader and JsonDumper: the json module of the standard library.
+    Subclasses wrap faster libraries, and fall back to json for what these reject or do not support, so that
+    every backend loads the same data.
+    """
+    name = 'json'
+
+    def loads(self, s, **kwargs):
+        """Parse a str, bytes or bytearray JSON document
+        :param kwargs: json.loads options
+        """
+        return json.loads(s, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        """Format obj as a JSON string
+        :param kwargs: json.dumps options
+        """
+        return json.dumps(obj, **kwargs)
+
+
+class _OrjsonBackend(JsonBackend):
+    """orjson, which writes UTF-8 and non-finite floats as null, and only indents by 2 spaces"""
+    name = 'orjson'
+
+    def loads(self, s, **kwargs):
+        if _plain_json(s, kwargs):
+            try:
+                return orjson.loads(s)
+            except ValueError:
+                # e.g. NaN or infinite floats, which json accepts
+                pass
+        return json.loads(s, **kwargs)
+
+    def dumps(self, obj, indent=None, sort_keys=False, **kwargs):
+        if not kwargs and indent in (None, 2):
+            option = orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, option=option).decode()
+            except TypeError:
+                pass
+        return json.dumps(obj, indent=indent, sort_keys=sort_keys, **kwargs)
+
+
+class _UjsonBackend(JsonBackend):
+    """ujson, which writes compact JSON unless indented"""
+    name = 'ujson'
+
+    def loads(self, s, **kwargs):
+        if _plain_json(s, kwargs):
+            try:
+                return ujson.loads(s)
+            except (ValueError, OverflowError):
+                pass
+        return json.loads(s, **kwargs)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs.keys() <= {'indent', 'sort_keys', 'ensure_ascii'}:
+            try:
+                return ujson.dumps(obj, escape_forward_slashes=False, **kwargs)
+            except (TypeError, OverflowError):
+                pass
+        return json.dumps(obj, **kwargs)
+
+
+class _SimdjsonBackend(JsonBackend):
+    """pysimdjson, a parser only"""
+    name = 'simdjson'
+
+    def loads(self, s, **kwargs):
+        if _plain_json(s, kwargs):
+            try:
+                return simdjson.loads(s)
+            except ValueError:
+                pass
+        return json.loads(s, **kwargs)
+
+
+# available backends by name, and the fastest of them, picked by JsonLoader and JsonDumper given None
+json_backends = {}
+
+
+def register_json_backend(backend):
+    """
+    Makes a JsonBackend instance selectable by its name in JsonLoader, JsonDumper, Serializer and the
+    command line.
+    """
+    json_backends[backend.name] = backend
+
+
+for _backend, _module in ((_OrjsonBackend, orjson), (_UjsonBackend, ujson), (_SimdjsonBackend, simdjson),
+                          (JsonBackend, json)):
+    if _module is not None:
+        register_json_backend(_backend())
+default_json_backend = next(iter(json_backends))
+
+
+def _json_backend(name):
+    """
+    Returns the registered backend of the given name, or the default one if None.
+    """
+    if name is None:
+        name = default_json_backend
+    try:
+        return json_backends[name]
+    except KeyError:
+        raise ValueError(f"Unknown JSON backend {name}, expected one of {list(json_backends)}") from None
+
+
 class JsonDumper:
-    def __init__(self, **kwargs):
+    def __init__(self, backend='json', **kwargs):
+        """
+        :param backend: Name of the JsonBackend to format JSON with, None for the fastest available. Defaults
+            to the json module, the output of others differing in spacing, floats or escaping.
+        :param kwargs: json.dumps options
+        """
+        self.backend = _json_backend(backend)
         self.kwargs = kwargs
 
     def __call__(self, obj, dest=None):
+        s = self.backend.dumps(obj, **self.kwargs)
         if dest is None:
-            return json.dumps(obj, **self.kwargs)
-        else:
-            return json.dump(obj, dest, **self.kwargs)
+            return s
+        dest.write(s)
 
 
 default_dumper = JsonDumper()
 
 
+# the PyYAML implementation YamlLoader and YamlDumper use by default: the C one when PyYAML is built with libyaml,
+# and the pure Python one otherwise
+yaml_implementation = "libyaml" if getattr(yaml, "__with_libyaml__", False) else "python"
+
+
+def _yaml_classes(libyaml):
+    """
+    Returns the safe loader and the dumper classes of the libyaml or pure Python implementation, the default one
+    if libyaml is None.
+    """
+    if libyaml is None:
+        libyaml = yaml_implementation == "libyaml"
+    if libyaml:
+        if not getattr(yaml, "__with_libyaml__", False):
+            raise ValueError("PyYAML is not built with libyaml")
+        return "libyaml", yaml.CSafeLoader, yaml.CDumper
+    return "python", yaml.SafeLoader, yaml.Dumper
+
+
 class YamlDumper:
     """Write object as YAML string"""
 
-    def __init__(self, **kwargs):
+    def __init__(self, libyaml=None, **kwargs):
+        """
+        :param libyaml: Whether to use the C implementation of PyYAML, by default if it is built with libyaml.
+        :param kwargs: yaml.dump options
+        """
+        self.implementation, _, self.dumper_class = _yaml_classes(libyaml)
         self.kwargs = kwargs
 
     def __call__(self,  obj, dest=None):
@@ -40,21 +241,27 @@ class YamlDumper:
         :param dest: file-like object
         :return: str
         """
-        return yaml.dump(obj, dest, **self.kwargs)
+        return yaml.dump(obj, dest, Dumper=self.dumper_class, **self.kwargs)
 
 class JsonLoader:
-    def __init__(self, **kwargs):
+    def __init__(self, backend='json', **kwargs):
+        """
+        :param backend: Name of the JsonBackend to parse JSON with, None for the fastest available. Defaults
+            to the json module, the others raising their own errors and falling back to it for some inputs.
+        :param kwargs: json.loads options, with which faster backends defer to the json module
+        """
+        self.backend = _json_backend(backend)
         self.kwargs = kwargs
 
     def __call__(self, src):
         """Parse and return JSON data
-        :param src: str|file-like source
+        :param src: str|bytes|file-like source, text or binary
         :return: dict parsed data
         """
-        if isinstance(src, str):
-            return json.loads(src, **self.kwargs)
+        if isinstance(src, (str, bytes, bytearray)):
+            return self.backend.loads(src, **self.kwargs)
         else:
-            return json.load(src, **self.kwargs)
+            return self.backend.loads(src.read(), **self.kwargs)
 
 
 default_loader = JsonLoader()
@@ -63,26 +270,48 @@ default_loader = JsonLoader()
 class YamlLoader:
     """Load YAML data from file-like object or string"""
 
+    def __init__(self, libyaml=None, multi_document=False):
+        """
+        :param libyaml: Whether to use the C implementation of PyYAML, by default if it is built with libyaml.
+        :param multi_document: Whether to return the list of the documents of a stream, empty for an empty
+            stream. False expects a single document, None for an empty stream.
+        """
+        self.implementation, self.loader_class, _ = _yaml_classes(libyaml)
+        self.multi_document = multi_document
+
     def __call__(self, src):
         """Parse and return YAML data
-        :param src: str|file-like source
+        :param src: str|bytes|file-like source
         :return: dict parsed data
         """
-        return yaml.safe_load(src)
+        if self.multi_document:
+            return list(self.iter_documents(src))
+        return yaml.load(src, Loader=self.loader_class)
+
+    def iter_documents(self, src):
+        """Parse the documents of a YAML stream one at a time, as they are read
+        :param src: str|bytes|file-like source
+        :return: iterator of parsed documents
+        """
+        return yaml.load_all(src, Loader=self.loader_class)
 
 class Serializer:
     """Serializer helper loads and stores object data
     :param file_format: str json or yaml
     :param indent: int Output indentation in spaces
+    :param json_backend: str name of the JsonBackend to load and dump json with, by default the json module,
+        None for the fastest available
+    :param multi_document: bool Whether to load yaml streams of several documents (e.g. Kubernetes manifests)
+        as lists of documents
     :raise ValueError: file_path does not contains valid file_format data
     """
 
-    def __init__(self, file_format, indent):
+    def __init__(self, file_format, indent, json_backend='json', multi_document=False):
         # pyyaml _can_ load json but is ~20 times slower and has known issues so use
-        # the json from stdlib when json is specified.
+        # a json backend when json is specified.
         self.serializers = {
-            "json": (JsonLoader(), JsonDumper(indent=indent)),
-            "yaml": (YamlLoader(), YamlDumper(indent=indent)),
+            "json": (JsonLoader(json_backend), JsonDumper(json_backend, indent=indent)),
+            "yaml": (YamlLoader(multi_document=multi_document), YamlDumper(indent=indent)),
         }
         self.file_format = file_format
         if file_format not in self.serializers:
@@ -111,6 +340,267 @@ class Serializer:
         dumper(obj, stream)
 
 
+def _edit_list(a, deleted, inserted):
+    """
+    Removes the elements of a at the deleted positions and adds the inserted (position, value) pairs in a single
+    pass copying the runs between edits by slice, as opposed to popping and inserting one by one, which costs a
+    move of the rest of the list per edit. Deleted positions must be given in decreasing order, and inserted
+    positions in increasing order of the result, as diffs list them: None is returned otherwise, for the caller
+    to apply the edits one by one.
+
+    :return: (lo, tail), the edited list being a[:lo] + tail, where lo is the first edited position.
+    """
+    n = len(a)
+    if deleted and (deleted[-1] < 0 or deleted[0] >= n or any(p <= q for p, q in zip(deleted, deleted[1:]))):
+        return None
+    if inserted and (inserted[0][0] < 0 or any(p >= q for (p, _), (q, _) in zip(inserted, inserted[1:]))):
+        return None
+    lo = min(deleted[-1] if deleted else n, inserted[0][0] if inserted else n, n)
+    if deleted:
+        kept = []
+        start = lo
+        for pos in reversed(deleted):
+            kept.extend(a[start:pos])
+            start = pos + 1
+        kept.extend(a[start:])
+        start = 0
+    else:
+        kept = a
+        start = lo
+    if not inserted:
+        return lo, kept if start == 0 else kept[start:]
+    tail = []
+    for pos, value in inserted:
+        count = pos - lo - len(tail)
+        if count > 0:
+            tail.extend(kept[start:start + count])
+            start += count
+        tail.append(value)
+    tail.extend(kept[start:])
+    return lo, tail
+
+
+def _patch_list(a, deleted, inserted, inplace):
+    """
+    Returns a list of the elements of the list or tuple a without the ones at the deleted positions, and with the
+    inserted (position, value) pairs, edits being applied in the order given. The list is a itself if inplace and
+    a is a list, and a copy otherwise.
+    """
+    edit = _edit_list(a, deleted, inserted) if deleted or inserted else None
+    if edit is not None:
+        lo, tail = edit
+        if inplace and type(a) is list:
+            a[lo:] = tail
+            return a
+        return [*a[:lo], *tail]
+    if not inplace or type(a) is not list:
+        a = list(a)
+    if deleted:
+        for pos in deleted:
+            a.pop(pos)
+    if inserted:
+        for pos, value in inserted:
+            a.insert(pos, value)
+    return a
+
+
+def _index(k):
+    """
+    Returns the list index given by the diff key k, or None if k is not one, in which case int(k) raises.
+    """
+    try:
+        return int(k)
+    except (TypeError, ValueError):
+        return None
+
+
+# kinds of the entries of a compiled diff node
+_DELETE, _INSERT, _SET, _NODE, _NOOP, _INVALID = range(6)
+
+
+def _compile_patch(d, symmetric):
+    """
+    Compiles a compact diff, or a symmetric one, into the operations of a PatchProgram.
+
+    :return: The operations, and the value replacing the whole structure if the diff is a replacement (missing
+        otherwise).
+    """
+    if not symmetric:
+        if not isinstance(d, dict):
+            return [], d
+        if replace in d:
+            return [], d[replace]
+    elif isinstance(d, list):
+        _, b = d
+        return [], b
+    elif not isinstance(d, dict):
+        raise Exception("Invalid symmetric diff")
+    if not d:
+        return [], missing
+    ops = {}
+    # (slot of the parent container, key, index, diff, slot), where slot 0 holds the root
+    stack = [(0, 0, 0, d, 1)]
+    next_slot = 2
+    while stack:
+        parent_slot, key, index, d, slot = stack.pop()
+        # applied to dicts (as (key, kind, value, diff, child slot)) and to lists (as (key, index, kind, value,
+        # child slot)), as the diff does not tell which of the two it patches
+        entries = []
+        indexed = []
+        for k, v in d.items():
+            if k is delete:
+                entries.append((k, _DELETE, list(v), v, None))
+                continue
+            if k is insert and symmetric:
+                entries.append((k, _INSERT, v, v, None))
+                continue
+            value = child = None
+            if symmetric:
+                if isinstance(v, list) and len(v) == 2:
+                    kind, value = _SET, v[1]
+                elif isinstance(v, dict):
+                    kind = _NODE if v else _NOOP
+                else:
+                    kind = _INVALID
+            elif not isinstance(v, dict):
+                kind, value = _SET, v
+            elif not v:
+                kind = _NOOP
+            elif replace in v:
+                kind, value = _SET, v[replace]
+            else:
+                kind = _NODE
+            i = _index(k)
+            if kind == _NODE:
+                child = next_slot
+                next_slot += 1
+                stack.append((slot, k, i, v, child))
+            entries.append((k, kind, value, v, child))
+            if k is not insert:
+                indexed.append((k, i, kind, value, child))
+        deleted = d.get(delete)
+        if symmetric:
+            deleted = [pos for pos, value in deleted] if isinstance(deleted, (list, tuple)) else None
+        ops[slot] = (parent_slot, key, index, slot, d, tuple(entries), tuple(indexed),
+                     deleted, d.get(insert), d.get(discard), d.get(add), symmetric)
+    return [ops[slot] for slot in range(1, next_slot)], missing
+
+
+class PatchProgram:
+    """
+    A diff compiled by JsonDiffer.compile_patch, to be applied to many structures without loading, unmarshalling
+    or walking the diff again.
+
+    The diff is flattened into one operation per container it patches, parents first, each taking its container
+    from its parent's patched copy. Operations under containers that a structure lacks, or that are replaced as a
+    whole, are skipped.
+    """
+
+    def __init__(self, ops, replacement=missing, options=None):
+        """
+        :param ops: The operations compiled by the syntax.
+        :param replacement: The value replacing the whole structure, if the diff is a replacement.
+        :param options: The options of the JsonDiffer loading and dumping structures, if any.
+        """
+        self._ops = ops
+        self._replacement = replacement
+        self._options = options
+
+    def apply(self, a, fp=None, inplace=False):
+        """
+        Applies the compiled diff to a JSON structure, as JsonDiffer.patch would.
+
+        :param a: The original JSON structure.
+        :param fp: Optional file pointer to dump the patched structure to.
+        :param inplace: Whether to modify a instead of copying the containers the diff changes.
+        :return: The patched JSON structure.
+        """
+        options = self._options
+        if options is not None and options.load:
+            a = options.loader(a)
+        b = self._patch(a, inplace)
+        if options is not None and options.dump:
+            return options.dumper(b, fp)
+        return b
+
+    def _patch(self, a, inplace):
+        if self._replacement is not missing:
+            return self._replacement
+        if not self._ops:
+            return a
+        # slot 0 holds the root; the slot of every other operation is set to True when its container is to be
+        # patched, then to the patched container, where its children find theirs
+        slots = [None] * (len(self._ops) + 1)
+        slots[0] = [a]
+        slots[1] = True
+        # list copies of tuples, converted back once their elements are patched
+        sequences = []
+        for (parent_slot, key, index, slot, d, entries, indexed,
+             deleted, inserted, discarded, added, symmetric) in self._ops:
+            if slots[slot] is None:
+                continue
+            parent = slots[parent_slot]
+            if not isinstance(parent, dict):
+                if index is None:
+                    int(key)
+                key = index
+            a = parent[key]
+            if isinstance(a, dict):
+                if not inplace:
+                    a = dict(a)
+                for k, kind, value, v, child in entries:
+                    if kind == _DELETE:
+                        for kdel in value:
+                            del a[kdel]
+                    elif kind == _INSERT:
+                        for kk, vv in v.items():
+                            a[kk] = vv
+                    elif k not in a:
+                        if symmetric:
+                            raise KeyError(k)
+                        a[k] = v
+                    elif kind == _SET:
+                        a[k] = value
+                    elif kind == _NODE:
+                        slots[child] = True
+                    elif kind == _INVALID:
+                        raise Exception("Invalid symmetric diff")
+            elif isinstance(a, (list, tuple)):
+                original_type = type(a)
+                a = _patch_list(a, deleted, inserted, inplace)
+                for k, i, kind, value, child in indexed:
+                    if i is None:
+                        int(k)
+                    if kind == _SET:
+                        a[i] = value
+                    elif kind == _NODE:
+                        slots[child] = True
+                    elif kind == _INVALID:
+                        raise Exception("Invalid symmetric diff")
+                if original_type is not list:
+                    sequences.append((parent, key, original_type))
+            elif isinstance(a, set):
+                if not inplace:
+                    a = set(a)
+                if discarded:
+                    for x in discarded:
+                        a.discard(x)
+                if added:
+                    for x in added:
+                        a.add(x)
+            elif symmetric:
+                raise Exception("Invalid symmetric diff")
+            else:
+                parent[key] = d
+                continue
+            parent[key] = a
+            slots[slot] = a
+        # innermost first, so that tuples are built from patched elements
+        for parent, key, original_type in reversed(sequences):
+            parent[key] = original_type(parent[key])
+        return slots[0][0]
+
+
 class JsonDiffSyntax:
     def emit_set_diff(self, a, b, s, added, removed):
         """
@@ -164,28 +654,41 @@ class JsonDiffSyntax:
         """
         raise NotImplementedError()
 
-    def patch(self, a, d):
+    def patch(self, a, d, inplace=False):
         """
         Applies a patch to a JSON structure.
 
         :param a: The original JSON structure.
         :param d: The patch to apply.
+        :param inplace: Whether to modify the containers of a instead of copying the ones the patch changes.
         :return: The patched JSON structure.
         :raises NotImplementedError: This is an abstract method.
         """
         raise NotImplementedError()
 
-    def unpatch(self, a, d):
+    def unpatch(self, a, d, inplace=False):
         """
         Reverses a patch on a JSON structure.
 
         :param a: The patched JSON structure.
         :param d: The patch that was applied.
+        :param inplace: Whether to modify the containers of a instead of copying the ones the patch changes.
         :return: The original JSON structure before the patch was applied.
         :raises NotImplementedError: This is an abstract method.
         """
         raise NotImplementedError()
 
+    def compile_patch(self, d):
+        """
+        Compiles a patch into the operations of a PatchProgram, see JsonDiffer.compile_patch.
+
+        :param d: The patch to compile.
+        :return: The operations, and the value replacing the whole structure if the patch is a replacement
+            (missing otherwise).
+        :raises NotImplementedError: This is an abstract method.
+        """
+        raise NotImplementedError()
+
 
 class CompactJsonDiffSyntax:
     """
@@ -290,58 +793,81 @@ class CompactJsonDiffSyntax:
         else:
             return {replace: b} if isinstance(b, dict) else b
 
-    def patch(self, a, d):
+    def patch(self, a, d, inplace=False):
         """
         Applies a compact diff to a JSON structure to produce the modified structure.
 
+        Only the containers on the paths to changes are copied, everything else is shared with a. With inplace,
+        the dicts, lists and sets of a are modified instead; tuples are still rebuilt.
+
         :param a: The original JSON structure.
         :param d: The compact diff to apply.
+        :param inplace: Whether to modify a instead of copying the containers the diff changes.
         :return: The modified JSON structure after applying the diff.
         """
-        if isinstance(d, dict):
-            if not d:
-                return a
-            if replace in d:
-                return d[replace]
-            if isinstance(a, dict):
-                a = dict(a)
-                for k, v in d.items():
-                    if k is delete:
-                        for kdel in v:
-                            del a[kdel]
-                    else:
-                        av = a.get(k, missing)
-                        if av is missing:
-                            a[k] = v
+        root = [a]
+        # (container, key, diff): container[key] is replaced by the result of patching it with diff
+        stack = [(root, 0, d)]
+        # list copies of tuples, converted back once their elements are patched
+        sequences = []
+        while stack:
+            parent, key, d = stack.pop()
+            a = parent[key]
+            if isinstance(d, dict):
+                if not d:
+                    continue
+                if replace in d:
+                    parent[key] = d[replace]
+                    continue
+                if isinstance(a, dict):
+                    if not inplace:
+                        a = dict(a)
+                    for k, v in d.items():
+                        if k is delete:
+                            for kdel in v:
+                                del a[kdel]
+                        elif k in a:
+                            stack.append((a, k, v))
                         else:
-                            a[k] = self.patch(av, v)
-                return a
-            elif isinstance(a, (list, tuple)):
-                original_type = type(a)
-                a = list(a)
-                if delete in d:
-                    for pos in d[delete]:
-                        a.pop(pos)
-                if insert in d:
-                    for pos, value in d[insert]:
-                        a.insert(pos, value)
-                for k, v in d.items():
-                    if k is not delete and k is not insert:
-                        k = int(k)
-                        a[k] = self.patch(a[k], v)
-                if original_type is not list:
-                    a = original_type(a)
-                return a
-            elif isinstance(a, set):
-                a = set(a)
-                if discard in d:
-                    for x in d[discard]:
-                        a.discard(x)
-                if add in d:
-                    for x in d[add]:
-                        a.add(x)
-                return a
-        return d
+                            a[k] = v
+                    parent[key] = a
+                    continue
+                elif isinstance(a, (list, tuple)):
+                    original_type = type(a)
+                    a = _patch_list(a, d.get(delete), d.get(insert), inplace)
+                    for k, v in d.items():
+                        if k is not delete and k is not insert:
+                            stack.append((a, int(k), v))
+                    if original_type is not list:
+                        sequences.append((parent, key, original_type))
+                    parent[key] = a
+                    continue
+                elif isinstance(a, set):
+                    if not inplace:
+                        a = set(a)
+                    if discard in d:
+                        for x in d[discard]:
+                            a.discard(x)
+                    if add in d:
+                        for x in d[add]:
+                            a.add(x)
+                    parent[key] = a
+                    continue
+            parent[key] = d
+        # innermost first, so that tuples are built from patched elements
+        for parent, key, original_type in reversed(sequences):
+            parent[key] = original_type(parent[key])
+        return root[0]
+
+    def compile_patch(self, d):
+        """
+        Compiles a compact diff into the operations of a PatchProgram, see JsonDiffer.compile_patch.
+
+        :param d: The compact diff to compile.
+        :return: The operations, and the value replacing the whole structure if the diff is a replacement
+            (missing otherwise).
+        """
+        return _compile_patch(d, symmetric=False)
 
 
 class ExplicitJsonDiffSyntax:
@@ -563,111 +1089,167 @@ class SymmetricJsonDiffSyntax:
         else:
             return [a, b]
 
-    def patch(self, a, d):
+    def patch(self, a, d, inplace=False):
         """
         Applies a symmetric diff to a JSON structure to produce the modified structure.
 
+        Only the containers on the paths to changes are copied, everything else is shared with a. With inplace,
+        the dicts, lists and sets of a are modified instead; tuples are still rebuilt.
+
         :param a: The original JSON structure.
         :param d: The symmetric diff to apply.
+        :param inplace: Whether to modify a instead of copying the containers the diff changes.
         :return: The modified JSON structure after applying the diff.
         """
-        if isinstance(d, list):
-            _, b = d
-            return b
-        elif isinstance(d, dict):
-            if not d:
-                return a
-            if isinstance(a, dict):
-                a = dict(a)
-                for k, v in d.items():
-                    if k is delete:
-                        for kdel, _ in v.items():
-                            del a[kdel]
-                    elif k is insert:
-                        for kk, vv in v.items():
-                            a[kk] = vv
-                    else:
-                        a[k] = self.patch(a[k], v)
-                return a
-            elif isinstance(a, (list, tuple)):
-                original_type = type(a)
-                a = list(a)
-                if delete in d:
-                    for pos, value in d[delete]:
-                        a.pop(pos)
-                if insert in d:
-                    for pos, value in d[insert]:
-                        a.insert(pos, value)
-                for k, v in d.items():
-                    if k is not delete and k is not insert:
-                        k = int(k)
-                        a[k] = self.patch(a[k], v)
-                if original_type is not list:
-                    a = original_type(a)
-                return a
-            elif isinstance(a, set):
-                a = set(a)
-                if discard in d:
-                    for x in d[discard]:
-                        a.discard(x)
-                if add in d:
-                    for x in d[add]:
-                        a.add(x)
-                return a
-        raise Exception("Invalid symmetric diff")
+        root = [a]
+        # (container, key, diff): container[key] is replaced by the result of patching it with diff
+        stack = [(root, 0, d)]
+        # list copies of tuples, converted back once their elements are patched
+        sequences = []
+        while stack:
+            parent, key, d = stack.pop()
+            a = parent[key]
+            if isinstance(d, list):
+                _, b = d
+                parent[key] = b
+                continue
+            elif isinstance(d, dict):
+                if not d:
+                    continue
+                if isinstance(a, dict):
+                    if not inplace:
+                        a = dict(a)
+                    for k, v in d.items():
+                        if k is delete:
+                            for kdel, _ in v.items():
+                                del a[kdel]
+                        elif k is insert:
+                            for kk, vv in v.items():
+                                a[kk] = vv
+                        else:
+                            stack.append((a, k, v))
+                    parent[key] = a
+                    continue
+                elif isinstance(a, (list, tuple)):
+                    original_type = type(a)
+                    a = _patch_list(a, [pos for pos, value in d.get(delete, ())], d.get(insert), inplace)
+                    for k, v in d.items():
+                        if k is not delete and k is not insert:
+                            stack.append((a, int(k), v))
+                    if original_type is not list:
+                        sequences.append((parent, key, original_type))
+                    parent[key] = a
+                    continue
+                elif isinstance(a, set):
+                    if not inplace:
+                        a = set(a)
+                    if discard in d:
+                        for x in d[discard]:
+                            a.discard(x)
+                    if add in d:
+                        for x in d[add]:
+                            a.add(x)
+                    parent[key] = a
+                    continue
+            raise Exception("Invalid symmetric diff")
+        # innermost first, so that tuples are built from patched elements
+        for parent, key, original_type in reversed(sequences):
+            parent[key] = original_type(parent[key])
+        return root[0]
 
-    def unpatch(self, b, d):
+    def unpatch(self, b, d, inplace=False):
         """
         Reverses a symmetric diff on a JSON structure to produce the original structure.
 
+        Only the containers on the paths to changes are copied, everything else is shared with b. With inplace,
+        the dicts, lists and sets of b are modified instead; tuples are still rebuilt.
+
         :param b: The modified JSON structure.
         :param d: The symmetric diff that was applied.
+        :param inplace: Whether to modify b instead of copying the containers the diff changes.
         :return: The original JSON structure before the diff was applied.
         """
-        if isinstance(d, list):
-            a, _ = d
-            return a
-        elif isinstance(d, dict):
-            if not d:
-                return b
-            if isinstance(b, dict):
-                b = dict(b)
-                for k, v in d.items():
-                    if k is delete:
-                        for kk, vv in v.items():
-                            b[kk] = vv
-                    elif k is insert:
-                        for kk, vv in v.items():
-                            del b[kk]
-                    else:
-                        b[k] = self.unpatch(b[k], v)
-                return b
-            elif isinstance(b, (list, tuple)):
-                original_type = type(b)
-                b = list(b)
-                for k, v in d.items():
-                    if k is not delete and k is not insert:
-                        k = int(k)
-                        b[k] = self.unpatch(b[k], v)
-                if insert in d:
-                    for pos, value in reversed(d[insert]):
-                        b.pop(pos)
-                if delete in d:
-                    for pos, value in reversed(d[delete]):
-                        b.insert(pos, value)
-                if original_type is not list:
-                    b = original_type(b)
-                return b
-            elif isinstance(b, set):
-                b = set(b)
-                if discard in d:
-                    for x in d[discard]:
-                        b.add(x)
-                if add in d:
-                    for x in d[add]:
-                        b.discard(x)
-                return b
-        raise Exception("Invalid symmetric diff")
+        root = [b]
+        # (container, key, diff): container[key] is replaced by the result of unpatching it with diff
+        stack = [(root, 0, d)]
+        # list copies whose insertions and deletions are reverted once their elements are unpatched, as
+        # changed elements are given by their positions in b
+        sequences = []
+        while stack:
+            parent, key, d = stack.pop()
+            b = parent[key]
+            if isinstance(d, list):
+                a, _ = d
+                parent[key] = a
+                continue
+            elif isinstance(d, dict):
+                if not d:
+                    continue
+                if isinstance(b, dict):
+                    if not inplace:
+                        b = dict(b)
+                    for k, v in d.items():
+                        if k is delete:
+                            for kk, vv in v.items():
+                                b[kk] = vv
+                        elif k is insert:
+                            for kk, vv in v.items():
+                                del b[kk]
+                        else:
+                            stack.append((b, k, v))
+                    parent[key] = b
+                    continue
+                elif isinstance(b, (list, tuple)):
+                    original_type = type(b)
+                    if not inplace or original_type is not list:
+                        b = list(b)
+                    for k, v in d.items():
+                        if k is not delete and k is not insert:
+                            stack.append((b, int(k), v))
+                    sequences.append((parent, key, original_type, d))
+                    parent[key] = b
+                    continue
+                elif isinstance(b, set):
+                    if not inplace:
+                        b = set(b)
+                    if discard in d:
+                        for x in d[discard]:
+                            b.add(x)
+                    if add in d:
+                        for x in d[add]:
+                            b.discard(x)
+                    parent[key] = b
+                    continue
+            raise Exception("Invalid symmetric diff")
+        # innermost first, so that every list is restored from unpatched elements
+        for parent, key, original_type, d in reversed(sequences):
+            b = parent[key]
+            # the insertions of d are deleted in reverse, and its deletions inserted back in reverse
+            deleted = [pos for pos, value in reversed(d.get(insert, ()))]
+            inserted = d.get(delete, ())[::-1]
+            edit = _edit_list(b, deleted, inserted) if deleted or inserted else None
+            if edit is not None:
+                # b is either a copy or, with inplace, the list to modify
+                lo, tail = edit
+                b[lo:] = tail
+            else:
+                for pos in deleted:
+                    b.pop(pos)
+                for pos, value in inserted:
+                    b.insert(pos, value)
+            if original_type is not list:
+                parent[key] = original_type(b)
+        return root[0]
+
+    def compile_patch(self, d):
+        """
+        Compiles a symmetric diff into the operations of a PatchProgram, see JsonDiffer.compile_patch.
+
+        :param d: The symmetric diff to compile.
+        :return: The operations, and the value replacing the whole structure if the diff is a replacement
+            (missing otherwise).
+        """
+        return _compile_patch(d, symmetric=True)
 
 
 class RightOnlyJsonDiffSyntax(CompactJsonDiffSyntax):
@@ -738,6 +1320,13 @@ class RightOnlyJsonDiffSyntax(CompactJsonDiffSyntax):
             return b
 
 
+Change = collections.namedtuple('Change', 'path op old new')
+Change.__doc__ = """
+A change yielded by JsonDiffer.iter_changes: at path, a tuple of dict keys and list indices, op is insert (of new),
+delete (of old), replace (of old by new), add (of new to a set) or discard (of old from a set). old and new are
+None when they do not apply.
+"""
+
 builtin_syntaxes = {
     'compact': CompactJsonDiffSyntax(),
     'symmetric': SymmetricJsonDiffSyntax(),
@@ -745,6 +1334,640 @@ builtin_syntaxes = {
     'rightonly': RightOnlyJsonDiffSyntax(),
 }
 
+list_algorithms = ('lcs', 'hirschberg', 'patience')
+
+# tolerance for float rounding when proving a similarity score falls below a threshold
+_SCORE_SLACK = 1e-9
+
+# elements read ahead in each array to realign arrays read in lockstep, and the similarity from which
+# differing elements with nothing to realign on are diffed as modified rather than compared with the rest
+_STREAM_WINDOW = 64
+_STREAM_MIN_SCORE = 0.5
+
+# bytes of files compared at a time by diff_files, and the JSON strings and delimiters it scans them for
+_COMPARE_CHUNK = 1 << 20
+# (the text up to the next bracket, ',' or ':' of an item, or up to the next bracket within a nested value)
+_JSON_DELIMITER = re.compile(rb'(?:[^"\[\]{},:]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+_JSON_NESTED = re.compile(rb'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+_JSON_SPACE = re.compile(rb'[ \t\n\r]*')
+
+# best candidates kept for each removed tuple while pairing the tuples removed from and added to a set
+_SET_CANDIDATES = 4
+
+# chunks of pairs submitted to an executor by diff_many and patch_many ahead of the results being consumed
+_BATCH_IN_FLIGHT = 16
+
+# nested comparisons delegating to each other before the next one is run on an explicit stack
+_CHAIN_DEPTH = 8
+
+
+class _PathTrie:
+    """
+    Dotted paths compiled into a tree with one node per path component, which the diff descends in lockstep
+    with the compared structures instead of formatting and looking up a path string at every node. The
+    component '*' matches any dict key or list index, and is kept under the None key, '\\*' matching a '*' key.
+    Dict keys holding dots descend one component per dot, as they did when paths were matched as the dotted
+    strings of the keys leading to them.
+    """
+    __slots__ = ('children', 'excluded', 'list_key', '_merged')
+
+    def __init__(self):
+        self.children = {}
+        self.excluded = False
+        self.list_key = None
+        self._merged = {}
+
+    @classmethod
+    def compile(cls, exclude_paths, list_keys):
+        """
+        Builds the trie of excluded paths and of the paths of lists with a list key, or returns None if
+        there are none. An already compiled trie is returned as is.
+        """
+        if isinstance(exclude_paths, cls):
+            return exclude_paths
+        if not exclude_paths and not isinstance(list_keys, dict):
+            return None
+        root = cls()
+        for path in exclude_paths or ():
+            root._insert(path).excluded = True
+        if isinstance(list_keys, dict):
+            for path, key in list_keys.items():
+                root._insert(path).list_key = key
+        return root
+
+    def _insert(self, path):
+        node = self
+        for component in path.split('.') if path else ():
+            if component == '*':
+                component = None
+            elif component == '\\*':
+                component = '*'
+            child = node.children.get(component)
+            if child is None:
+                child = node.children[component] = _PathTrie()
+            node = child
+        return node
+
+    def descend(self, key):
+        """
+        Returns the node of the dict key or list index below this one, or None if no path continues with it.
+        """
+        if type(key) is not str:
+            key = str(key)
+        elif '.' in key:
+            node = self
+            for component in key.split('.'):
+                node = node.descend(component)
+                if node is None:
+                    break
+            return node
+        node = self.children.get(key)
+        wildcard = self.children.get(None)
+        if wildcard is None or node is wildcard:
+            return node
+        if node is None:
+            return wildcard
+        merged = self._merged.get(key)
+        if merged is None:
+            merged = self._merged[key] = node._merge(wildcard)
+        return merged
+
+    def excludes(self, key):
+        """
+        Tells whether the dict key or list index below this node is excluded.
+        """
+        node = self.descend(key)
+        return node is not None and node.excluded
+
+    def shifted(self, offset):
+        """
+        Returns the node of the list at this node once its first offset elements are removed.
+        """
+        node = _PathTrie()
+        node.excluded = self.excluded
+        node.list_key = self.list_key
+        for component, child in self.children.items():
+            if component is None or not component.isdigit():
+                node.children[component] = child
+            elif int(component) >= offset:
+                node.children[str(int(component) - offset)] = child
+        return node
+
+    def _merge(self, other):
+        merged = _PathTrie()
+        merged.excluded = self.excluded or other.excluded
+        merged.list_key = self.list_key if self.list_key is not None else other.list_key
+        for component in self.children.keys() | other.children.keys():
+            child = self.children.get(component)
+            other_child = other.children.get(component)
+            if child is None or other_child is None:
+                merged.children[component] = child or other_child
+            else:
+                merged.children[component] = child._merge(other_child)
+        return merged
+
+
+class _JsonReader:
+    """
+    Reads a JSON text file a value or container delimiter at a time, keeping in memory only the unread part of
+    the chunks read so far.
+    """
+    __slots__ = ('fp', 'chunk_size', 'buf', 'pos', 'eof', 'first')
+
+    decoder = json.JSONDecoder()
+
+    def __init__(self, fp, chunk_size=1 << 16):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        # whether the open container has no items read yet
+        self.first = False
+
+    def _error(self, msg):
+        return JSONDecodeError(msg, self.buf, self.pos)
+
+    def _fill(self, size):
+        data = self.fp.read(size)
+        if not data:
+            self.eof = True
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+
+    def peek(self):
+        """
+        Skips whitespace and returns the next character, or '' at the end of the file.
+        """
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if self.eof:
+                return ''
+            self._fill(self.chunk_size)
+
+    def value(self):
+        """
+        Reads the next value whole.
+        """
+        if not self.peek():
+            raise self._error('Expecting value')
+        while True:
+            try:
+                x, end = self.decoder.raw_decode(self.buf, self.pos)
+            except JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # a number may go on in the next chunk
+                if self.eof or end < len(self.buf) and (self.buf[end] not in '0123456789.eE+-'
+                                                        or self.buf[self.pos] in '"[{'):
+                    self.pos = end
+                    return x
+            # reading as much again as is buffered keeps rereading the value linear
+            self._fill(max(self.chunk_size, len(self.buf) - self.pos))
+
+    def open(self):
+        """
+        Reads the '{' or '[' opening the next value.
+        """
+        self.peek()
+        self.pos += 1
+        self.first = True
+
+    def next(self, close):
+        """
+        Moves to the next item of the open container, or reads its closing character and returns False.
+        """
+        c = self.peek()
+        if c == close:
+            self.pos += 1
+            self.first = False
+            return False
+        if not self.first:
+            if c != ',':
+                raise self._error("Expecting ',' delimiter")
+            self.pos += 1
+        self.first = False
+        return True
+
+    def key(self):
+        """
+        Reads the next key of the open object and its ':', or its closing '}' and returns missing.
+        """
+        if not self.next('}'):
+            return missing
+        if self.peek() != '"':
+            raise self._error('Expecting property name enclosed in double quotes')
+        k = self.value()
+        if self.peek() != ':':
+            raise self._error("Expecting ':' delimiter")
+        self.pos += 1
+        return k
+
+    def rest_object(self, k):
+        """
+        Reads the rest of the open object whole, from the value of the key k just read (or missing).
+        """
+        d = {}
+        while k is not missing:
+            d[k] = self.value()
+            k = self.key()
+        return d
+
+    def rest_array(self, items):
+        """
+        Reads the rest of the open array whole, appending its elements to the list items.
+        """
+        while self.next(']'):
+            items.append(self.value())
+        return items
+
+    def close(self):
+        """
+        Checks that nothing but whitespace follows the value read.
+        """
+        if self.peek():
+            raise self._error('Extra data')
+
+
+class _ArrayLookahead:
+    """
+    The elements of an array open in a _JsonReader, read ahead as needed.
+    """
+    __slots__ = ('reader', 'items', 'open')
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.items = collections.deque()
+        self.open = True
+
+    def fill(self, n):
+        """
+        Reads ahead until n elements are buffered or the array ends, and returns the buffered elements.
+        """
+        while self.open and len(self.items) < n:
+            if self.reader.next(']'):
+                self.items.append(self.reader.value())
+            else:
+                self.open = False
+        return self.items
+
+    def drop(self, n):
+        for _ in range(n):
+            self.items.popleft()
+
+    def rest(self):
+        """
+        Reads the rest of the array whole, with the buffered elements.
+        """
+        items = list(self.items)
+        self.items.clear()
+        if self.open:
+            self.open = False
+            self.reader.rest_array(items)
+        return items
+
+
+class _Unchanged:
+    """
+    Stands for a top-level item left unparsed by JsonDiffer.diff_files, being the same bytes in both files. The
+    same instance is put in both documents, and is equal only to itself.
+    """
+    __slots__ = ()
+
+
+@contextlib.contextmanager
+def _mapped(f):
+    """
+    Maps the binary file f into memory, or provides its content read whole if it cannot be mapped (an empty
+    file, a pipe).
+    """
+    try:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (ValueError, OSError):
+        yield f.read()
+        return
+    with m:
+        yield m
+
+
+def _common_length(a, b, n, reverse=False):
+    """
+    Returns the length of the longest common prefix (or suffix, with reverse) of the bytes a and b, up to n,
+    comparing a chunk at a time and bisecting the first chunk that differs.
+    """
+    def same(lo, hi):
+        if reverse:
+            return a[len(a) - hi:len(a) - lo] == b[len(b) - hi:len(b) - lo]
+        return a[lo:hi] == b[lo:hi]
+
+    lo = 0
+    while lo < n:
+        hi = min(lo + _COMPARE_CHUNK, n)
+        if same(lo, hi):
+            lo = hi
+            continue
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if same(lo, mid):
+                lo = mid
+            else:
+                hi = mid
+        return lo
+    return n
+
+
+def _scan_items(buf, pos, items, after_comma=False):
+    """
+    Finds the items of the JSON object or array in the bytes buf without parsing them, from pos at the start of
+    an item, and appends their (start, colon, end) offsets to items: colon is the offset of the ':' after the key
+    of an object item (None in arrays) and end the offset of the ',' or closing bracket after the item. Returns
+    the offset after the closing bracket, or None if the delimiters found do not close the container.
+    """
+    depth = 1
+    start = pos
+    colon = None
+    while True:
+        # one match runs over the strings and everything else up to the next delimiter
+        pos = (_JSON_DELIMITER if depth == 1 else _JSON_NESTED).match(buf, pos).end()
+        if pos == len(buf):
+            return None
+        c = buf[pos:pos + 1]
+        pos += 1
+        if c in b'[{':
+            depth += 1
+        elif c in b']}':
+            depth -= 1
+            if depth == 0:
+                if _JSON_SPACE.match(buf, start).end() < pos - 1:
+                    items.append((start, colon, pos - 1))
+                elif after_comma:
+                    return None
+                return pos
+        elif c == b':':
+            colon = pos - 1
+        elif c != b',' or _JSON_SPACE.match(buf, start).end() == pos - 1:
+            # an unterminated string, or an empty item
+            return None
+        else:
+            items.append((start, colon, pos - 1))
+            start = pos
+            colon = None
+            after_comma = True
+
+
+def _load_key(b):
+    """
+    Loads the key of an object item from its bytes, decoding strings without escapes directly.
+    """
+    b = b.strip()
+    if len(b) >= 2 and b[0] == b[-1] == ord('"') and b'\\' not in b:
+        return b[1:-1].decode()
+    return json.loads(b)
+
+
+def _split_mapped(A, B, start_a, start_b, prefix, suffix):
+    """
+    Finds the top-level items of the JSON objects or arrays in the bytes A and B, opening at start_a and
+    start_b, given the lengths of the prefix and suffix common to A and B. Returns the item offsets of each,
+    as found by _scan_items, and the numbers of leading and trailing items which are the same bytes in both,
+    or None if either container is not well delimited.
+    """
+    is_object = A[start_a] == ord('{')
+    items_a = []
+    end = _scan_items(A, start_a + 1, items_a)
+    if end is None or _JSON_SPACE.match(A, end).end() != len(A):
+        return None
+    # the items of A ending before the common prefix does, and their ',', are the first items of B as well,
+    # which is scanned from there (the last item of A is left out, as B may go on after it)
+    lead = min(bisect.bisect_left([e for s, c, e in items_a], prefix), max(len(items_a) - 1, 0))
+    items_b = items_a[:lead]
+    end = _scan_items(B, items_a[lead - 1][2] + 1 if lead else start_b + 1, items_b, lead > 0)
+    if end is None or _JSON_SPACE.match(B, end).end() != len(B):
+        return None
+    if any((c is None) == is_object for items in (items_a, items_b) for s, c, e in items):
+        return None
+    # the items starting in the common suffix as far from the end of both are the same bytes
+    trail = 0
+    while trail < min(len(items_a), len(items_b)) - lead:
+        sa, ca, ea = items_a[-1 - trail]
+        sb, cb, eb = items_b[-1 - trail]
+        if sa < len(A) - suffix or len(A) - sa != len(B) - sb or len(A) - ea != len(B) - eb:
+            break
+        trail += 1
+    return items_a, items_b, lead, trail
+
+
+def _holds_unchanged(d):
+    """
+    Tells whether an _Unchanged item made its way into the diff d.
+    """
+    stack = [d]
+    while stack:
+        o = stack.pop()
+        if isinstance(o, _Unchanged):
+            return True
+        if isinstance(o, dict):
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set)):
+            stack.extend(o)
+    return False
+
+
+@functools.lru_cache(maxsize=None)
+def _escaped_symbols(escape_str):
+    """
+    Returns the mapping of escaped symbols to their Symbol instances for escape_str, shared by all differs.
+    """
+    return {escape_str + symbol.label: symbol for symbol in _all_symbols_}
+
+
+def _diff_chunk(differ, pairs, exclude_paths):
+    """
+    Diffs a chunk of the (a, b) pairs of JsonDiffer.diff_many, with a copy of the differ, which holds the state
+    of the diff it computes.
+    """
+    differ = copy.copy(differ)
+    return [differ.diff(a, b, None, exclude_paths) for a, b in pairs]
+
+
+def _patch_chunk(differ, pairs, inplace):
+    """
+    Patches a chunk of the (a, d) pairs of JsonDiffer.patch_many, with a copy of the differ.
+    """
+    differ = copy.copy(differ)
+    return [differ.patch(a, d, None, inplace) for a, d in pairs]
+
+
+def _compare_in_worker(differ, pairs, scores, escaping):
+    """
+    Diffs the (a, b, node) pairs sent to a worker process by JsonDiffer.diff, returning their (diff, score)
+    results in order, or only their scores with scores.
+    """
+    with differ._comparing([a for a, b, node in pairs], [b for a, b, node in pairs], escaping=escaping):
+        if scores:
+            return [differ._obj_score(a, b, None, node) for a, b, node in pairs]
+        return [differ._obj_diff(a, b, node) for a, b, node in pairs]
+
+
+def _increasing_pairs(pairs):
+    """
+    Returns the longest subsequence of (i, j) position pairs, given in increasing i order, whose j positions
+    are increasing too.
+    """
+    tails = []
+    tail_indices = []
+    predecessors = []
+    for k, (i, j) in enumerate(pairs):
+        t = bisect.bisect_left(tails, j)
+        if t == len(tails):
+            tails.append(j)
+            tail_indices.append(k)
+        else:
+            tails[t] = j
+            tail_indices[t] = k
+        predecessors.append(tail_indices[t-1] if t > 0 else -1)
+    r = []
+    k = tail_indices[-1] if tail_indices else -1
+    while k >= 0:
+        r.append(pairs[k])
+        k = predecessors[k]
+    r.reverse()
+    return r
+
+
+_CONTAINER_TYPES = (dict, list, tuple, set)
+
+
+def _traversable(a, b):
+    """
+    Tells whether a and b are compared element by element: two dicts, two lists, two tuples or two sets.
+    """
+    if type(a) is type(b) and type(a) in _CONTAINER_TYPES:
+        return True
+    if isinstance(a, dict):
+        return isinstance(b, dict)
+    if isinstance(a, tuple):
+        return isinstance(b, tuple)
+    if isinstance(a, list):
+        return isinstance(b, list)
+    if isinstance(a, set):
+        return isinstance(b, set)
+    return False
+
+
+def _rebuild(root, map_key, map_value):
+    """
+    Copies the dicts, lists and tuples of root, applying map_key to every dict key and map_value to every
+    other value. Nested containers are handled on an explicit stack, so the depth of root is not bounded by the
+    recursion limit.
+    """
+    if not isinstance(root, (dict, list, tuple)):
+        return map_value(root)
+    # [source container, iterator over its (key, value) items, copy, key of the nested container being copied]
+    stack = [[root, iter(root.items()) if isinstance(root, dict) else enumerate(root),
+              {} if isinstance(root, dict) else [], None]]
+    while True:
+        frame = stack[-1]
+        src, items, out, _ = frame
+        for k, v in items:
+            if isinstance(v, (dict, list, tuple)):
+                frame[3] = k
+                if isinstance(v, dict):
+                    stack.append([v, iter(v.items()), {}, None])
+                else:
+                    stack.append([v, enumerate(v), [], None])
+                break
+            if type(out) is dict:
+                out[map_key(k)] = map_value(v)
+            else:
+                out.append(map_value(v))
+        else:
+            stack.pop()
+            if type(out) is not dict and type(src) is not list:
+                out = type(src)(out)
+            if not stack:
+                return out
+            parent = stack[-1]
+            if type(parent[2]) is dict:
+                parent[2][map_key(parent[3])] = out
+            else:
+                parent[2].append(out)
+
+
+def _remap_lazily(root, escape_str, convert, skip=()):
+    """
+    Returns root with convert applied to every dict key and every other value that is a symbol or a string
+    starting with escape_str, like _rebuild, except that the dicts, lists and tuples are copied only if convert
+    changes something in them, and that the objects whose id() is in skip are kept as they are. Marshals with
+    JsonDiffer._escape, and unmarshals with JsonDiffer._unescape.
+    """
+    def escape(o):
+        if type(o) is Symbol or (isinstance(o, str) and o.startswith(escape_str) and id(o) not in skip):
+            return convert(o)
+        return o
+
+    if id(root) in skip:
+        return root
+    if not isinstance(root, (dict, list, tuple)):
+        return escape(root)
+    # [source container, iterator over its numbered items, copy or None while nothing changed, pending item]
+    # where the pending item (position, key, escaped key, value) is the one whose nested container is escaped
+    stack = [[root, enumerate(root.items() if isinstance(root, dict) else root), None, None]]
+    result = None
+    while True:
+        frame = stack[-1]
+        src, items, out, pending = frame
+        is_dict = isinstance(src, dict)
+        if pending is not None:
+            frame[3] = None
+            n, k, k2, v = pending
+            if out is None and (k2 is not k or result is not v):
+                out = frame[2] = dict(itertools.islice(src.items(), n)) if is_dict else list(src[:n])
+            if out is not None:
+                if is_dict:
+                    out[k2] = result
+                else:
+                    out.append(result)
+        for n, v in items:
+            if is_dict:
+                k, v = v
+                t = type(k)
+                k2 = k if t is int or (t is str and not k.startswith(escape_str)) else escape(k)
+            else:
+                k = k2 = n
+            t = type(v)
+            if t is str:
+                v2 = v if not v.startswith(escape_str) or id(v) in skip else convert(v)
+            elif t is int or t is float or t is bool or v is None:
+                v2 = v
+            elif isinstance(v, (dict, list, tuple)) and id(v) not in skip:
+                frame[3] = (n, k, k2, v)
+                stack.append([v, enumerate(v.items() if isinstance(v, dict) else v), None, None])
+                break
+            else:
+                v2 = escape(v)
+            if out is None and (k2 is not k or v2 is not v):
+                out = frame[2] = dict(itertools.islice(src.items(), n)) if is_dict else list(src[:n])
+            if out is not None:
+                if is_dict:
+                    out[k2] = v2
+                else:
+                    out.append(v2)
+        if frame[3] is not None:
+            continue
+        stack.pop()
+        if out is None:
+            result = src
+        elif is_dict or type(src) is list:
+            result = out
+        else:
+            result = type(src)(out)
+        if not stack:
+            return result
+
 
 class JsonDiffer:
     """
@@ -755,10 +1978,18 @@ class JsonDiffer:
         _symbol_map (dict): A mapping of escaped symbols to their Symbol instances.
 
     Methods:
-        diff(a, b, fp=None): Computes the difference between two JSON structures.
+        diff(a, b, fp=None, workers=None): Computes the difference between two JSON structures.
+        diff_many(pairs, executor=None): Computes the differences of many pairs of JSON structures.
+        diff_files(first, second, fp=None): Computes the difference between two JSON files, parsing only what differs.
         similarity(a, b): Calculates the similarity score between two JSON structures.
-        patch(a, d, fp=None): Applies a diff to a JSON structure to produce the modified structure.
-        unpatch(b, d, fp=None): Reverses a diff on a JSON structure to produce the original structure.
+        iter_changes(a, b): Yields the changes between two JSON structures as they are found.
+        write_changes(a, b, fp): Writes the changes between two JSON structures to fp as they are found.
+        patch(a, d, fp=None, inplace=False): Applies a diff to a JSON structure to produce the modified structure.
+        patch_many(pairs, executor=None): Applies many diffs to JSON structures.
+        adiff(a, b), apatch(a, d), asimilarity(a, b): Asynchronous diff, patch and similarity, which let the
+            event loop run other tasks meanwhile.
+        unpatch(b, d, fp=None, inplace=False): Reverses a diff on a JSON structure to produce the original structure.
+        compile_patch(d): Compiles a diff to be applied to many structures.
         _unescape(x): Unescapes a string that has been escaped.
         unmarshal(d): Converts a marshaled (potentially escaped) structure back to its original form.
         _escape(o): Escapes a string or symbol that needs escaping.
@@ -767,12 +1998,35 @@ class JsonDiffer:
     class Options:
         """
         A placeholder class for options used by JsonDiffer. Options include syntax, load, dump, marshal,
-        loader, dumper, and escape_str.
+        loader, dumper, escape_str, list_algorithm, hash_index, cache_size, list_keys and parallel_threshold.
         """
         pass
 
+    # structural hashes of the containers being compared, by id(), while hash_index is enabled
+    _hashes = None
+    # least recently used scores of compared container pairs, by id() pair, while cache_size is set
+    _score_cache = None
+    cache_hits = 0
+    cache_misses = 0
+    # length of the chain of nested comparisons delegating to each other, while running traversal steps, and
+    # the length past which nested comparisons are run on the explicit stack, 0 while cooperating with a loop
+    _depth = 0
+    _chain_depth = _CHAIN_DEPTH
+    # whether diffs are marshaled as they are emitted, while computing a marshaled diff
+    _escaping = False
+    # (diff, score) results computed by worker processes, by id() pair and path trie node, while diffing with
+    # workers; the diff is missing for pairs only scored. Pairs are recorded instead of scored while not None.
+    _precomputed = None
+    _recording = None
+    bytes_parsed = 0
+    bytes_skipped = 0
+    items_parsed = 0
+    items_skipped = 0
+    parse_seconds = 0.0
+
     def __init__(self, syntax='compact', load=False, dump=False, marshal=False,
-                 loader=default_loader, dumper=default_dumper, escape_str='$'):
+                 loader=default_loader, dumper=default_dumper, escape_str='$',
+                 list_algorithm='lcs', hash_index=False, cache_size=0, list_keys=None, parallel_threshold=1000):
         """
         Initializes the JsonDiffer with specified options.
 
@@ -783,7 +2037,26 @@ class JsonDiffer:
         :param loader: Custom function for loading JSON data.
         :param dumper: Custom function for dumping JSON data.
         :param escape_str: String used to escape special characters in keys.
-        """
+        :param list_algorithm: The list alignment algorithm, one of 'lcs' (full LCS matrix, the default),
+            'hirschberg' (same weighted LCS in linear memory, for long lists) or 'patience' (elements unique
+            and equal in both lists anchor the alignment, and only the windows between anchors go through the
+            LCS matrix: faster on long, mostly unchanged lists, but crossing anchors can give a worse alignment
+            and a lower similarity than 'lcs').
+        :param hash_index: Whether to hash every container of both inputs up front, so that equal subtrees
+            are recognised without walking them and can anchor 'patience' list alignments.
+        :param cache_size: Number of container pair similarity scores to memoize during each diff or similarity
+            call, evicting the least recently used. 0 disables the cache. The cache_hits and cache_misses
+            attributes count lookups made by the last call.
+        :param list_keys: Match list elements by identity key instead of by position: the name of the key
+            holding the identity of dict elements, a function returning the identity of an element (or None),
+            or a dict mapping paths (as in exclude_paths) of lists to either. Lists with elements lacking a key
+            or with repeated keys are diffed by position.
+        :param parallel_threshold: Number of pairs of elements of the top-level structures to compare from which
+            diff sends them to its worker processes, when given workers.
+        :raise ValueError: list_algorithm is not supported.
+        """
+        if list_algorithm not in list_algorithms:
+            raise ValueError(f"Unsupported list algorithm {list_algorithm}, expected one of {list_algorithms}")
         self.options = JsonDiffer.Options()
         self.options.syntax = builtin_syntaxes.get(syntax, syntax)
         self.options.load = load
@@ -792,71 +2065,543 @@ class JsonDiffer:
         self.options.loader = loader
         self.options.dumper = dumper
         self.options.escape_str = escape_str
-        self._symbol_map = {
-            escape_str + symbol.label: symbol
-            for symbol in _all_symbols_
-        }
+        self.options.list_algorithm = list_algorithm
+        self.options.hash_index = hash_index
+        self.options.cache_size = cache_size
+        self.options.list_keys = list_keys
+        self.options.parallel_threshold = parallel_threshold
+        self._symbol_map = _escaped_symbols(escape_str)
+
+    def __getstate__(self):
+        # attributes with a class default hold the state of a call, which is not sent to worker processes
+        return {k: v for k, v in self.__dict__.items() if not hasattr(JsonDiffer, k)}
+
+    def _build_hash_index(self, root, index):
+        """
+        Records the structural hash of every container in root, keyed by id(), computing children before
+        their parents so every node is hashed once. Equal structures get equal hashes; different structures
+        may collide, so a matching hash is always confirmed with == (see _equal).
+        """
+        def node_hash(o):
+            h = index.get(id(o))
+            if h is not None:
+                return h
+            try:
+                return hash(o)
+            except TypeError:
+                # not a container we know how to hash, only equal to itself
+                return id(o)
+
+        stack = [(root, False)]
+        while stack:
+            o, children_done = stack.pop()
+            if id(o) in index:
+                continue
+            if isinstance(o, dict):
+                children = o.values()
+            elif isinstance(o, (list, tuple)):
+                children = o
+            elif isinstance(o, set):
+                index[id(o)] = hash(('set', frozenset(o)))
+                continue
+            else:
+                continue
+            if not children_done:
+                stack.append((o, True))
+                stack.extend((c, False) for c in children if isinstance(c, (dict, list, tuple, set)))
+            elif isinstance(o, dict):
+                index[id(o)] = hash(('dict', frozenset((k, node_hash(v)) for k, v in o.items())))
+            else:
+                index[id(o)] = hash((type(o) is tuple, tuple(node_hash(c) for c in o)))
+
+    def _equal(self, a, b):
+        """
+        Tells whether two objects are equal, rejecting unequal containers in O(1) by their structural hash
+        when the hash index is enabled. Structures nested too deeply for == are reported unequal, leaving
+        them to the traversal.
+        """
+        if a is b:
+            return True
+        hashes = self._hashes
+        if hashes is not None:
+            ha = hashes.get(id(a))
+            if ha is not None and ha != hashes.get(id(b)):
+                return False
+        try:
+            return a == b
+        except RecursionError:
+            return False
+
+    def _run(self, steps):
+        """
+        Runs traversal steps to completion. Steps are generators returning the result of a comparison, which
+        delegate to the steps of nested comparisons with yield from, keeping the Python stack as deep as the
+        chain of comparisons delegating to each other. Past _CHAIN_DEPTH of them, the steps of the next nested
+        comparison are yielded instead (see _detached), and run here on an explicit stack with their result sent
+        back, so that the depth of the compared structures is not bounded by the recursion limit.
+        """
+        stack = []
+        value = None
+        self._depth = 0
+        while True:
+            try:
+                nested = steps.send(value)
+            except StopIteration as e:
+                if not stack:
+                    return e.value
+                steps, self._depth = stack.pop()
+                value = e.value
+            else:
+                stack.append((steps, self._depth))
+                steps = nested
+                value = None
+                self._depth = 0
+
+    async def _run_cooperatively(self, steps, yield_every, time_slice):
+        """
+        Runs traversal steps to completion like _run, for a differ whose _chain_depth is 0 so that every nested
+        comparison is run on the explicit stack, yielding to the event loop after yield_every of them, or once
+        running for time_slice seconds.
+        """
+        stack = []
+        value = None
+        self._depth = 0
+        count = 0
+        deadline = None if time_slice is None else time.perf_counter() + time_slice
+        while True:
+            try:
+                nested = steps.send(value)
+            except StopIteration as e:
+                if not stack:
+                    return e.value
+                steps, self._depth = stack.pop()
+                value = e.value
+            else:
+                stack.append((steps, self._depth))
+                steps = nested
+                value = None
+                self._depth = 0
+                count += 1
+                if count >= yield_every or deadline is not None and time.perf_counter() >= deadline:
+                    await asyncio.sleep(0)
+                    count = 0
+                    if deadline is not None:
+                        deadline = time.perf_counter() + time_slice
 
-    def _list_diff_0(self, C, X, Y):
+    def _cooperating(self):
         """
-        Helper method for computing list differences using dynamic programming.
+        Returns a copy of the differ to compare structures on while yielding to an event loop, which holds the
+        state of its comparison apart from any other one made in the meantime.
+        """
+        differ = copy.copy(self)
+        differ._chain_depth = 0
+        return differ
+
+    def _detached(self, steps):
         """
-        i, j = len(X), len(Y)
+        Traversal steps having steps run on the explicit stack of _run, used for nested comparisons once the
+        chain of comparisons delegating to each other is _CHAIN_DEPTH long.
+        """
+        return (yield steps)
+
+    def _list_diff_0(self, C, S, ilo=0, jlo=0):
+        """
+        Helper method for computing list differences using dynamic programming: backtracks the LCS matrix C
+        using the pairwise scores S recorded while filling it, so no pair is compared twice.
+        """
+        i, j = len(C) - 1, len(C[0]) - 1
         r = []
         while True:
             if i > 0 and j > 0:
-                d, s = self._obj_diff(X[i-1], Y[j-1])
+                s = S[i-1][j-1]
                 if s > 0 and C[i][j] == C[i-1][j-1] + s:
-                    r.append((0, d, j-1, s))
+                    r.append((0, ilo + i - 1, jlo + j - 1, s))
                     i, j = i - 1, j - 1
                     continue
             if j > 0 and (i == 0 or C[i][j-1] >= C[i-1][j]):
-                r.append((1, Y[j-1], j-1, 0.0))
+                r.append((1, None, jlo + j - 1, 0.0))
                 j = j - 1
                 continue
             if i > 0 and (j == 0 or C[i][j-1] < C[i-1][j]):
-                r.append((-1, X[i-1], i-1, 0.0))
+                r.append((-1, ilo + i - 1, None, 0.0))
                 i = i - 1
                 continue
             return reversed(r)
 
-    def _list_diff(self, X, Y):
-        """
-        Computes the difference between two lists.
-        """
-        # LCS
-        m = len(X)
-        n = len(Y)
-        # An (m+1) times (n+1) matrix
+    def _lcs_row(self, X, Y, ilo, ihi, jlo, jhi, node=None, reverse=False):
+        """
+        Computes the last row of the weighted LCS matrix of X[ilo:ihi] and Y[jlo:jhi] keeping only two rows
+        in memory. With reverse=True both slices are traversed back to front.
+        """
+        n = jhi - jlo
+        irange = range(ihi - 1, ilo - 1, -1) if reverse else range(ilo, ihi)
+        jrange = range(jhi - 1, jlo - 1, -1) if reverse else range(jlo, jhi)
+        prev = [0.0] * (n+1)
+        for i in irange:
+            x = X[i]
+            xnode = node.descend(i) if node is not None else None
+            cur = [0.0] * (n+1)
+            for k, j in enumerate(jrange, 1):
+                y = Y[j]
+                s = self._value_score(x, y, xnode)
+                if s is None:
+                    self._depth += 1
+                    s = yield from self._obj_score_steps(x, y, None, xnode)
+                    self._depth -= 1
+                cur[k] = max(cur[k-1], prev[k], prev[k-1] + s)
+            prev = cur
+        return prev
+
+    def _list_diff_block(self, X, Y, ilo, ihi, jlo, jhi, node=None):
+        """
+        Aligns X[ilo:ihi] and Y[jlo:jhi] with the full LCS matrix: fills the weighted LCS matrix C, an (m+1)
+        times (n+1) matrix, along with the m times n matrix S of pairwise similarity scores, and backtracks it.
+        """
+        m = ihi - ilo
+        n = jhi - jlo
         C = [[0 for j in range(n+1)] for i in range(m+1)]
+        S = [[0.0] * n for i in range(m)]
         for i in range(1, m+1):
+            x = X[ilo + i - 1]
+            xnode = node.descend(ilo + i - 1) if node is not None else None
             for j in range(1, n+1):
-                _, s = self._obj_diff(X[i-1], Y[j-1])
+                y = Y[jlo + j - 1]
+                s = self._value_score(x, y, xnode)
+                if s is None:
+                    self._depth += 1
+                    s = yield from self._obj_score_steps(x, y, None, xnode)
+                    self._depth -= 1
+                S[i-1][j-1] = s
                 # Following lines are part of the original LCS algorithm
                 # left in the code in case modification turns out to be problematic
                 #if X[i-1] == Y[j-1]:
                 #    C[i][j] = C[i-1][j-1] + 1
                 #else:
                 C[i][j] = max(C[i][j-1], C[i-1][j], C[i-1][j-1] + s)
+        return list(self._list_diff_0(C, S, ilo, jlo))
+
+    def _list_diff_hirschberg(self, X, Y, ilo, ihi, jlo, jhi, node=None):
+        """
+        Computes the same weighted LCS alignment as _list_diff_0 in linear memory using Hirschberg's divide
+        and conquer: X is split in half and Y at the position maximising the sum of the forward and backward
+        LCS rows, until one side is short enough for the full matrix.
+        """
+        m = ihi - ilo
+        n = jhi - jlo
+        if m <= 1 or n <= 1:
+            return (yield from self._list_diff_block(X, Y, ilo, ihi, jlo, jhi, node))
+        imid = ilo + m // 2
+        forward = yield from self._lcs_row(X, Y, ilo, imid, jlo, jhi, node)
+        backward = yield from self._lcs_row(X, Y, imid, ihi, jlo, jhi, node, reverse=True)
+        k = max(range(n+1), key=lambda k: forward[k] + backward[n-k])
+        head = yield from self._list_diff_hirschberg(X, Y, ilo, imid, jlo, jlo + k, node)
+        tail = yield from self._list_diff_hirschberg(X, Y, imid, ihi, jlo + k, jhi, node)
+        return head + tail
+
+    def _list_anchors(self, X, Y, ilo, ihi, jlo, jhi):
+        """
+        Finds the elements occurring exactly once in both X[ilo:ihi] and Y[jlo:jhi] (patience diff) and returns
+        the longest run of them appearing in the same order, as (i, j) position pairs. Unhashable elements are
+        only anchors when the structural hash index is enabled.
+        """
+        hashes = self._hashes
+
+        def unique_positions(Z, lo, hi):
+            positions = {}
+            for k in range(lo, hi):
+                z = Z[k]
+                if hashes is not None:
+                    z = hashes.get(id(z), z)
+                try:
+                    positions[z] = -1 if z in positions else k
+                except (TypeError, RecursionError):
+                    pass
+            return positions
+
+        xpos = unique_positions(X, ilo, ihi)
+        ypos = unique_positions(Y, jlo, jhi)
+        pairs = [
+            (i, ypos[x])
+            for x, i in xpos.items()
+            if i >= 0 and ypos.get(x, -1) >= 0 and (hashes is None or self._equal(X[i], Y[ypos[x]]))
+        ]
+        return _increasing_pairs(pairs)
+
+    def _list_trim(self, X, Y, ilo, ihi, jlo, jhi):
+        """
+        Strips the common leading and trailing elements of X[ilo:ihi] and Y[jlo:jhi], which are matched directly
+        without any similarity scoring. Returns the steps matching the leading elements, the bounds of the
+        window left in between and the steps matching the trailing elements. The alignment is the one of the
+        LCS matrix of the whole slices: its backtrack, from the end, matches the trailing elements first, but
+        could match an element left in the window with the last leading element, so leading elements equal
+        to one left in the window are left in it.
+        """
+        tail = []
+        while ilo < ihi and jlo < jhi and self._equal(X[ihi-1], Y[jhi-1]):
+            ihi, jhi = ihi - 1, jhi - 1
+            tail.append((0, ihi, jhi, 1.0))
+        tail.reverse()
+        head = []
+        while ilo < ihi and jlo < jhi and self._equal(X[ilo], Y[jlo]):
+            head.append((0, ilo, jlo, 1.0))
+            ilo, jlo = ilo + 1, jlo + 1
+        while head and any(self._equal(X[ilo-1], z) for z in itertools.chain(X[ilo:ihi], Y[jlo:jhi])):
+            head.pop()
+            ilo, jlo = ilo - 1, jlo - 1
+        return head, ilo, ihi, jlo, jhi, tail
+
+    def _list_key_function(self, node):
+        """
+        Returns the function giving the identity key of the elements of the list at the path trie node, or
+        None when the list is diffed by position.
+        """
+        list_keys = self.options.list_keys
+        if isinstance(list_keys, dict):
+            list_keys = node.list_key if node is not None else None
+        if list_keys is None or callable(list_keys):
+            return list_keys
+        return lambda x: x.get(list_keys) if isinstance(x, dict) else None
+
+    def _list_align_keyed(self, X, Y, key, node=None, diffs=None):
+        """
+        Aligns two lists by matching the elements having the same key. The longest run of key matches in the
+        same order in both lists are aligned, elements which moved are deleted and inserted again. Returns
+        None if some element has no key, or a key is repeated within a list. When a diffs dict is given, the
+        key matches are diffed rather than scored, as for _list_align.
+        """
+        def key_positions(Z):
+            positions = {}
+            for k, z in enumerate(Z):
+                zkey = key(z)
+                if zkey is None or zkey in positions:
+                    return None
+                positions[zkey] = k
+            return positions
+
+        try:
+            xpos = key_positions(X)
+            ypos = key_positions(Y) if xpos is not None else None
+        except TypeError:
+            # unhashable key
+            return None
+        if ypos is None:
+            return None
+        r = []
+        ilo, jlo = 0, 0
+        for i, j in _increasing_pairs([(i, ypos[k]) for k, i in xpos.items() if k in ypos]):
+            if diffs is not None:
+                d, s = yield from self._list_pair_diff(X, Y, i, j, node)
+                if s > 0:
+                    diffs[i] = d
+            else:
+                xnode = node.descend(i) if node is not None else None
+                s = self._value_score(X[i], Y[j], xnode)
+                if s is None:
+                    self._depth += 1
+                    s = yield from self._obj_score_steps(X[i], Y[j], None, xnode)
+                    self._depth -= 1
+            if s == 0:
+                continue
+            r.extend((-1, i2, None, 0.0) for i2 in range(ilo, i))
+            r.extend((1, None, j2, 0.0) for j2 in range(jlo, j))
+            r.append((0, i, j, s))
+            ilo, jlo = i + 1, j + 1
+        r.extend((-1, i2, None, 0.0) for i2 in range(ilo, len(X)))
+        r.extend((1, None, j2, 0.0) for j2 in range(jlo, len(Y)))
+        return r
+
+    def _list_align(self, X, Y, node=None, diffs=None):
+        """
+        Aligns two lists, returning (sign, i, j, s) steps in list order: 1 inserts Y[j], -1 deletes X[i] and
+        0 matches X[i] with Y[j] with similarity s. Elements are matched by key when list_keys has a key for
+        the list. Otherwise the common ends of the lists are matched directly, and with the 'patience' algorithm
+        elements which are unique and equal in both lists anchor the alignment, so only the windows between
+        anchors are compared by similarity. X[i] is compared at path index i. When a diffs dict is given, the
+        elements left alone in a window are diffed rather than scored, and the diff of X[i] is stored in diffs[i]
+        so that it is not computed again.
+        """
+        key = self._list_key_function(node)
+        if key is not None:
+            r = yield from self._list_align_keyed(X, Y, key, node, diffs)
+            if r is not None:
+                return r
+        r = []
+        ilo, jlo = 0, 0
+        if self.options.list_algorithm == 'patience':
+            anchors = self._list_anchors(X, Y, 0, len(X), 0, len(Y))
+        else:
+            anchors = []
+        anchors.append((len(X), len(Y)))
+        for i, j in anchors:
+            if ilo < i and jlo < j:
+                # align the window up to the anchor, trimmed of its common ends
+                head, wilo, wihi, wjlo, wjhi, tail = self._list_trim(X, Y, ilo, i, jlo, j)
+                r.extend(head)
+                if diffs is not None and wihi - wilo == 1 and wjhi - wjlo == 1:
+                    # matched if similar at all, as the LCS of a single pair would
+                    d, s = yield from self._list_pair_diff(X, Y, wilo, wjlo, node)
+                    if s > 0:
+                        diffs[wilo] = d
+                        r.append((0, wilo, wjlo, s))
+                    else:
+                        r.append((-1, wilo, None, 0.0))
+                        r.append((1, None, wjlo, 0.0))
+                elif wilo < wihi and wjlo < wjhi:
+                    if self.options.list_algorithm == 'hirschberg':
+                        r.extend((yield from self._list_diff_hirschberg(X, Y, wilo, wihi, wjlo, wjhi, node)))
+                    else:
+                        r.extend((yield from self._list_diff_block(X, Y, wilo, wihi, wjlo, wjhi, node)))
+                else:
+                    r.extend((-1, i2, None, 0.0) for i2 in range(wilo, wihi))
+                    r.extend((1, None, j2, 0.0) for j2 in range(wjlo, wjhi))
+                r.extend(tail)
+            else:
+                r.extend((-1, i2, None, 0.0) for i2 in range(ilo, i))
+                r.extend((1, None, j2, 0.0) for j2 in range(jlo, j))
+            if i < len(X):
+                r.append((0, i, j, 1.0))
+            ilo, jlo = i + 1, j + 1
+        return r
+
+    def _list_pair_diff(self, X, Y, i, j, node=None):
+        """
+        Computes the difference between X[i] and Y[j].
+        """
+        xnode = node.descend(i) if node is not None else None
+        ds = self._value_diff(X[i], Y[j], xnode)
+        if ds is None:
+            self._depth += 1
+            ds = yield from self._obj_diff_steps(X[i], Y[j], xnode)
+            self._depth -= 1
+        return ds
+
+    def _list_diff(self, X, Y, node=None):
+        """
+        Computes the difference between two lists.
+        """
         inserted = []
         deleted = []
         changed = {}
+        diffs = {}
         tot_s = 0.0
 
-        for sign, value, pos, s in self._list_diff_0(C, X, Y):
+        for sign, i, j, s in (yield from self._list_align(X, Y, node, diffs)):
             if sign == 1:
-                inserted.append((pos, value))
+                inserted.append((j, Y[j]))
             elif sign == -1:
-                deleted.insert(0, (pos, value))
-            elif sign == 0 and s < 1:
-                changed[pos] = value
+                deleted.append((i, X[i]))
+            elif i in diffs or s < 1 or not self._equal(X[i], Y[j]):
+                # only pairs on the alignment path have their diff materialized, including the ones whose
+                # differences are too deep to show in their score
+                d = diffs.get(i, missing)
+                if d is missing:
+                    d, _ = yield from self._list_pair_diff(X, Y, i, j, node)
+                if s < 1 or d:
+                    changed[j] = d
             tot_s += s
+        deleted.reverse()
         tot_n = len(X) + len(inserted)
         if tot_n == 0:
             s = 1.0
         else:
             s = tot_s / tot_n
-        return self.options.syntax.emit_list_diff(X, Y, s, inserted, changed, deleted), s
+        children = {id(d) for d in changed.values()} if self._escaping else ()
+        return self._escaped(self.options.syntax.emit_list_diff(X, Y, s, inserted, changed, deleted), children), s
+
+    def _list_score(self, X, Y, min_score=None, node=None):
+        """
+        Computes the similarity score of two lists without building their diff. Returns None without aligning
+        the lists when their lengths alone rule out reaching min_score.
+        """
+        if min_score and X and Y and min(len(X), len(Y)) < (min_score - _SCORE_SLACK) * max(len(X), len(Y)):
+            return None
+        n_inserted = 0
+        tot_s = 0.0
+        for sign, i, j, s in (yield from self._list_align(X, Y, node)):
+            if sign == 1:
+                n_inserted += 1
+            tot_s += s
+        tot_n = len(X) + n_inserted
+        return tot_s / tot_n if tot_n != 0 else 1.0
+
+    def _set_score(self, a, removed, added, min_score=None):
+        """
+        Computes the similarity score of a set and the set obtained by removing and adding elements, pairing
+        the most similar removed and added elements first. Set elements are hashable and the removed and added
+        ones are never equal, so only pairs of tuples can be partially similar: nothing else is scored. Tuples
+        are paired with tuples of the same length first, and the ones left over with each other, regardless of
+        their length. Returns None without scoring any pair when even perfect pairings could not reach
+        min_score.
+        """
+        removed_tuples = [x for x in removed if isinstance(x, tuple)]
+        added_tuples = [y for y in added if isinstance(y, tuple)]
+        n_tot = len(a) + len(added)
+        s_common = float(len(a) - len(removed))
+        n_pairable = min(len(removed_tuples), len(added_tuples))
+        if min_score and s_common + n_pairable < (min_score - _SCORE_SLACK) * n_tot:
+            return None
+        if n_pairable:
+            buckets = {}
+            for x in removed_tuples:
+                buckets.setdefault(len(x), ([], []))[0].append(x)
+            for y in added_tuples:
+                buckets.setdefault(len(y), ([], []))[1].append(y)
+            left_removed = []
+            left_added = []
+            for xs, ys in buckets.values():
+                if xs and ys:
+                    paired, xs, ys = yield from self._set_pairings(xs, ys)
+                    s_common += paired
+                left_removed.extend(xs)
+                left_added.extend(ys)
+            # removed tuples whose candidates were all taken may still pair with a tuple that was not one of them
+            paired = 1.0
+            while paired and left_removed and left_added:
+                paired, left_removed, left_added = yield from self._set_pairings(left_removed, left_added)
+                s_common += paired
+        return s_common / n_tot if n_tot != 0 else 1.0
+
+    def _set_pairings(self, removed, added):
+        """
+        Pairs removed and added tuples, the most similar first, keeping only the _SET_CANDIDATES most similar
+        added tuples of each removed one rather than every scored pair. Pairs with equal scores are taken in
+        enumeration order. Returns the sum of the scores of the pairs made and the removed and added tuples
+        left unpaired.
+        """
+        candidates = []
+        for x in removed:
+            # the best (score, -position in added) candidates, least similar on top
+            best = []
+            for k, y in enumerate(added):
+                s = self._value_score(x, y, None)
+                if s is None:
+                    self._depth += 1
+                    s = yield from self._obj_score_steps(x, y)
+                    self._depth -= 1
+                if s > 0:
+                    if len(best) < _SET_CANDIDATES:
+                        heapq.heappush(best, (s, -k))
+                    elif (s, -k) > best[0]:
+                        heapq.heapreplace(best, (s, -k))
+            best.sort(reverse=True)
+            candidates.append(best)
+        # the next candidate of each removed tuple, by (-score, position in removed, position in added, rank)
+        ranking = [(-c[0][0], i, -c[0][1], 0) for i, c in enumerate(candidates) if c]
+        heapq.heapify(ranking)
+        paired_removed = set()
+        paired_added = set()
+        paired = 0.0
+        while ranking:
+            s, i, k, rank = heapq.heappop(ranking)
+            if k not in paired_added:
+                paired_removed.add(i)
+                paired_added.add(k)
+                paired -= s
+            elif rank + 1 < len(candidates[i]):
+                s, k = candidates[i][rank + 1]
+                heapq.heappush(ranking, (-s, i, -k, rank + 1))
+        return (paired, [x for i, x in enumerate(removed) if i not in paired_removed],
+                [y for k, y in enumerate(added) if k not in paired_added])
 
     def _set_diff(self, a, b):
         """
@@ -866,32 +2611,60 @@ class JsonDiffer:
         added = b.difference(a)
         if not removed and not added:
             return {}, 1.0
-        ranking = sorted(
-            (
-                (self._obj_diff(x, y)[1], x, y)
-                for x in removed
-                for y in added
-            ),
-            reverse=True,
-            key=lambda x: x[0]
-        )
-        r2 = set(removed)
-        a2 = set(added)
-        n_common = len(a) - len(removed)
-        s_common = float(n_common)
-        for s, x, y in ranking:
-            if x in r2 and y in a2:
-                r2.discard(x)
-                a2.discard(y)
-                s_common += s
-                n_common += 1
-            if not r2 or not a2:
-                break
-        n_tot = len(a) + len(added)
-        s = s_common / n_tot if n_tot != 0 else 1.0
-        return self.options.syntax.emit_set_diff(a, b, s, added, removed), s
+        s = yield from self._set_score(a, removed, added)
+        return self._escaped(self.options.syntax.emit_set_diff(a, b, s, added, removed)), s
 
-    def _dict_diff(self, a, b, exclude_paths, path):
+    def _dict_score(self, a, b, min_score=None, node=None):
+        """
+        Computes the similarity score of two dictionaries without building their diff. With min_score, every
+        matched value is scored against the lowest score still keeping the total above min_score, and None is
+        returned as soon as the keys left to compare cannot make up the difference.
+        """
+        excludes = node.excludes if node is not None and node.children else None
+        nadded = 0
+        nremaining = 0
+        for k in b:
+            if excludes is not None and excludes(k):
+                continue
+            if k in a:
+                nremaining += 1
+            else:
+                nadded += 1
+        n_tot = nadded + (len(a) if excludes is None else sum(1 for k in a if not excludes(k)))
+        if n_tot == 0:
+            return 1.0
+        target = (min_score - _SCORE_SLACK) * n_tot if min_score else None
+        smatched = 0.0
+        for k, v in a.items():
+            w = b.get(k, missing)
+            if w is missing or (excludes is not None and excludes(k)):
+                continue
+            nremaining -= 1
+            child = node.descend(k) if node is not None else None
+            if v is w or (not isinstance(v, _CONTAINER_TYPES) and v == w):
+                s = 1.0
+            else:
+                s = self._value_score(v, w, child)
+            if target is None:
+                if s is None:
+                    self._depth += 1
+                    s = yield from self._obj_score_steps(v, w, None, child)
+                    self._depth -= 1
+                smatched += 0.5 + 0.5 * s
+                continue
+            # each matched key contributes between 0.5 and 1.0
+            if smatched + nremaining + 1.0 < target:
+                return None
+            if s is None:
+                self._depth += 1
+                s = yield from self._obj_score_steps(v, w, 2.0 * (target - smatched - nremaining) - 1.0, child)
+                self._depth -= 1
+                if s is None:
+                    return None
+            smatched += 0.5 + 0.5 * s
+        return smatched / n_tot
+
+    def _dict_diff(self, a, b, node=None):
         """
         Computes the difference between two dictionaries.
         """
@@ -903,153 +2676,851 @@ class JsonDiffer:
         added = {}
         changed = {}
         for k, v in a.items():
-            new_path = f'{path}.{k}' if path else k
-            if new_path in exclude_paths:
+            child = node.descend(k) if node is not None else None
+            if child is not None and child.excluded:
                 continue
             w = b.get(k, missing)
             if w is missing:
                 nremoved += 1
                 removed[k] = v
-            else:
-                nmatched += 1
-                d, s = self._obj_diff(v, w, exclude_paths, new_path)
-                if s < 1.0:
-                    changed[k] = d
-                smatched += 0.5 + 0.5 * s
+                continue
+            nmatched += 1
+            if v is w or (not isinstance(v, _CONTAINER_TYPES) and v == w):
+                smatched += 1.0
+                continue
+            ds = self._value_diff(v, w, child)
+            if ds is None:
+                self._depth += 1
+                ds = yield from self._obj_diff_steps(v, w, child)
+                self._depth -= 1
+            d, s = ds
+            # differences deep enough may round the score of their ancestors up to 1.0
+            if s < 1.0 or d:
+                changed[k] = d
+            smatched += 0.5 + 0.5 * s
         for k, v in b.items():
             if k not in a:
-                new_path = f'{path}.{k}' if path else k
-                if new_path in exclude_paths:
+                if node is not None and node.excludes(k):
                     continue
                 nadded += 1
                 added[k] = v
         n_tot = nremoved + nmatched + nadded
         s = smatched / n_tot if n_tot != 0 else 1.0
-        return self.options.syntax.emit_dict_diff(a, b, s, added, changed, removed), s
+        children = {id(d) for d in changed.values()} if self._escaping else ()
+        return self._escaped(self.options.syntax.emit_dict_diff(a, b, s, added, changed, removed), children), s
 
-    def _obj_diff(self, a, b, exclude_paths=None, path=''):
+    def _value_diff(self, a, b, node):
         """
-        Computes the difference between any two JSON-compatible objects.
+        Computes the difference between two objects when it needs no traversal: excluded paths, equal objects,
+        and anything but two dicts, two lists, two tuples or two sets. Returns None otherwise.
         """
-        if not exclude_paths:
-            exclude_paths = []
-        if path in exclude_paths:
+        if node is not None and node.excluded:
             return {}, 1.0
         if a is b:
-            return self.options.syntax.emit_value_diff(a, b, 1.0), 1.0
-        if isinstance(a, dict) and isinstance(b, dict):
-            return self._dict_diff(a, b, exclude_paths, path)
-        elif isinstance(a, tuple) and isinstance(b, tuple):
-            return self._list_diff(a, b)
-        elif isinstance(a, list) and isinstance(b, list):
-            return self._list_diff(a, b)
-        elif isinstance(a, set) and isinstance(b, set):
-            return self._set_diff(a, b)
-        elif a != b:
-            return self.options.syntax.emit_value_diff(a, b, 0.0), 0.0
+            return self._escaped(self.options.syntax.emit_value_diff(a, b, 1.0)), 1.0
+        if not _traversable(a, b):
+            if a != b:
+                return self._escaped(self.options.syntax.emit_value_diff(a, b, 0.0)), 0.0
+            return self._escaped(self.options.syntax.emit_value_diff(a, b, 1.0)), 1.0
+        if self._hashes is not None and self._equal(a, b):
+            return self._escaped(self.options.syntax.emit_value_diff(a, b, 1.0)), 1.0
+        if self._precomputed is not None:
+            ds = self._precomputed.get((id(a), id(b), node))
+            if ds is not None and ds[0] is not missing:
+                return ds
+        return None
+
+    def _escaped(self, d, children=()):
+        """
+        Returns the diff d emitted by the syntax, marshaled if the diff being computed is, except for the diffs
+        of its children, which were marshaled when they were emitted.
+        """
+        if not self._escaping:
+            return d
+        return _remap_lazily(d, self.options.escape_str, self._escape, children)
+
+    def _obj_diff_steps(self, a, b, node=None):
+        """
+        Returns the traversal steps computing the difference between two dicts, two lists, two tuples or two
+        sets.
+        """
+        if isinstance(a, dict):
+            steps = self._dict_diff(a, b, node)
+        elif isinstance(a, set):
+            steps = self._set_diff(a, b)
+        else:
+            steps = self._list_diff(a, b, node)
+        return steps if self._depth < self._chain_depth else self._detached(steps)
+
+    def _obj_diff(self, a, b, node=None):
+        """
+        Computes the difference between any two JSON-compatible objects. node is the position of a and b in
+        the trie of configured paths, None when no configured path goes through it.
+        """
+        ds = self._value_diff(a, b, node)
+        if ds is None:
+            ds = self._run(self._obj_diff_steps(a, b, node))
+        return ds
+
+    def _value_score(self, a, b, node):
+        """
+        Computes the similarity score of two objects when it needs no traversal: excluded paths, equal
+        objects, anything but two dicts, two lists, two tuples or two sets, and cached scores. Returns None
+        otherwise.
+        """
+        if node is not None and node.excluded:
+            return 1.0
+        if a is b:
+            return 1.0
+        if not _traversable(a, b):
+            return 0.0 if a != b else 1.0
+        if self._hashes is not None and self._equal(a, b):
+            return 1.0
+        if self._precomputed is not None:
+            ds = self._precomputed.get((id(a), id(b), node))
+            if ds is not None:
+                return ds[1]
+            if self._recording is not None:
+                self._recording.append((a, b, node))
+                return 0.0
+        cache = self._score_cache
+        if cache is None:
+            return None
+        key = (id(a), id(b), node)
+        s = cache.get(key)
+        if s is not None:
+            self.cache_hits += 1
+            cache.move_to_end(key)
+            return s
+        self.cache_misses += 1
+        return None
+
+    def _obj_score_steps(self, a, b, min_score=None, node=None):
+        """
+        Returns the traversal steps computing the similarity score of two dicts, two lists, two tuples or two
+        sets, the same value _obj_diff returns, without emitting any diff structures. When min_score is given,
+        None may be returned instead once the score is known to be below it.
+        """
+        if isinstance(a, dict):
+            steps = self._dict_score(a, b, min_score, node)
+        elif isinstance(a, set):
+            steps = self._set_score(a, a.difference(b), b.difference(a), min_score)
         else:
-            return self.options.syntax.emit_value_diff(a, b, 1.0), 1.0
+            steps = self._list_score(a, b, min_score, node)
+        if self._score_cache is not None:
+            steps = self._cached_score(steps, (id(a), id(b), node))
+        return steps if self._depth < self._chain_depth else self._detached(steps)
+
+    def _cached_score(self, steps, key):
+        """
+        Traversal steps recording the score computed by steps in the score cache.
+        """
+        s = yield from steps
+        # scores cut short by min_score are not exact and are never cached
+        if s is not None:
+            cache = self._score_cache
+            cache[key] = s
+            if len(cache) > self.options.cache_size:
+                cache.popitem(last=False)
+        return s
 
-    def diff(self, a, b, fp=None, exclude_paths: list = None) -> dict:
+    def _obj_score(self, a, b, min_score=None, node=None):
+        """
+        Computes the similarity score between any two JSON-compatible objects, see _obj_score_steps.
+        """
+        s = self._value_score(a, b, node)
+        if s is None:
+            s = self._run(self._obj_score_steps(a, b, min_score, node))
+        return s
+
+    @contextlib.contextmanager
+    def _comparing(self, a, b, exclude_paths=None, escaping=False):
+        """
+        Sets up the state shared by all comparisons made while diffing or scoring a against b, and provides
+        the root of the trie of excluded paths and list_keys paths (None if there are none). With escaping,
+        diffs are marshaled as they are emitted.
+        """
+        if self.options.hash_index:
+            self._hashes = {}
+            self._build_hash_index(a, self._hashes)
+            self._build_hash_index(b, self._hashes)
+        if self.options.cache_size:
+            # keyed by id() pairs, which stay unique while a and b are alive
+            self._score_cache = collections.OrderedDict()
+            self.cache_hits = 0
+            self.cache_misses = 0
+        self._escaping = escaping
+        try:
+            yield _PathTrie.compile(exclude_paths, self.options.list_keys)
+        finally:
+            self._hashes = None
+            self._score_cache = None
+            self._escaping = False
+            self._precomputed = None
+
+    def diff(self, a, b, fp=None, exclude_paths: list = None, workers=None) -> dict:
         """
         Computes the difference between two JSON structures.
         :param a: The original JSON structure.
         :param b: The modified JSON structure.
         :param fp: Optional file pointer to dump the diff to.
-        :param exclude_paths: Optional list of string paths to exclude from the diff.
+        :param exclude_paths: Optional list of string paths to exclude from the diff. Path components are
+            dict keys and list indices (positions in a) separated by dots, '*' matches any key or index and
+            '\\*' a '*' key.
+        :param workers: Optional number of worker processes comparing the elements of the top-level structures
+            (see _diff_in_workers). The diff is the same as without workers.
         """
-        if not exclude_paths:
-            exclude_paths = []
         if self.options.load:
             a = self.options.loader(a)
             b = self.options.loader(b)
 
-        d, s = self._obj_diff(a, b, exclude_paths)
+        d = self._diff(a, b, exclude_paths, workers)
 
-        if self.options.marshal or self.options.dump:
-            d = self.marshal(d)
+        if self.options.dump:
+            return self.options.dumper(d, fp)
+        else:
+            return d
+
+    async def adiff(self, a, b, fp=None, exclude_paths=None, executor=None, yield_every=1000, time_slice=None):
+        """
+        Computes the difference between two JSON structures as diff does, yielding to the running event loop
+        every yield_every nested comparisons, or every time_slice seconds, or in the executor if one is given.
+        Loading and dumping, and the scalar items of a single dict or list, are not broken up.
+
+        :param executor: Optional concurrent.futures executor to run diff on instead, e.g. a process pool for
+            large structures. The differ must be picklable for a process pool.
+        :param yield_every: Number of nested comparisons of dicts, lists, tuples or sets run between yields.
+        :param time_slice: Optional time in seconds after which to yield, however few comparisons were run.
+        """
+        if executor is not None:
+            run = functools.partial(copy.copy(self).diff, a, b, fp, exclude_paths)
+            return await asyncio.get_running_loop().run_in_executor(executor, run)
+        differ = self._cooperating()
+        if differ.options.load:
+            a = differ.options.loader(a)
+            b = differ.options.loader(b)
+
+        with differ._comparing(a, b, exclude_paths, differ.options.marshal or differ.options.dump) as paths:
+            ds = differ._value_diff(a, b, paths)
+            if ds is None:
+                ds = await differ._run_cooperatively(differ._obj_diff_steps(a, b, paths), yield_every, time_slice)
+        d, s = ds
+
+        if differ.options.dump:
+            return differ.options.dumper(d, fp)
+        else:
+            return d
+
+    def _diff(self, a, b, exclude_paths, workers=None):
+        """
+        Computes the difference between two loaded JSON structures, marshaled if it is to be marshaled or dumped.
+        """
+        # marshaled in the same pass, copying only what needs escaping
+        with self._comparing(a, b, exclude_paths, self.options.marshal or self.options.dump) as paths:
+            if workers is not None and workers > 1:
+                self._diff_in_workers(a, b, paths, workers)
+            d, s = self._obj_diff(a, b, paths)
+        return d
+
+    def _diff_in_workers(self, a, b, node, workers):
+        """
+        Diffs the elements of a and b in worker processes ahead of their diff, which picks their diffs and
+        scores up from _precomputed: the values of the keys of two dicts found in both, or the element pairs
+        of two lists or tuples that their alignment scores, and then the pairs it aligns. Nothing is sent to
+        workers if fewer pairs than parallel_threshold are to be compared, or if the differ cannot be pickled.
+        Lists aligned with the hirschberg algorithm, which does not keep the scores of all pairs, only have
+        the scores and diffs of the pairs it compares first computed by workers, the rest serially.
+        """
+        if self._value_diff(a, b, node) is not None or isinstance(a, set):
+            return
+        threshold = self.options.parallel_threshold
+        self._precomputed = {}
+        pool = None
+
+        def compare(pairs, scores=False):
+            # the pool is only started for work to submit
+            nonlocal pool
+            if pool is None:
+                pool = concurrent.futures.ProcessPoolExecutor(workers)
+            # a few chunks per worker, so that they finish about together
+            n = -(-len(pairs) // (4 * workers))
+            chunks = [pairs[k:k + n] for k in range(0, len(pairs), n)]
+            results = pool.map(_compare_in_worker, itertools.repeat(self), chunks, itertools.repeat(scores),
+                               itertools.repeat(self._escaping))
+            for (x, y, xnode), r in zip(pairs, itertools.chain.from_iterable(results)):
+                self._precomputed[(id(x), id(y), xnode)] = (missing, r) if scores else r
+
+        try:
+            if isinstance(a, dict):
+                pairs = []
+                for k, v in a.items():
+                    w = b.get(k, missing)
+                    child = node.descend(k) if node is not None else None
+                    if w is not missing and self._value_diff(v, w, child) is None:
+                        pairs.append((v, w, child))
+                if len(pairs) >= threshold and self._picklable():
+                    compare(pairs)
+                return
+            # the pairs scored by the alignment are recorded, without scoring them, then scored by the workers
+            self._recording = []
+            try:
+                self._run(self._list_align(a, b, node))
+                pairs = self._recording
+            finally:
+                self._recording = None
+            if len(pairs) < threshold or not self._picklable():
+                # left to the diff to score, once
+                return
+            compare(pairs, scores=True)
+            # aligned with the scores of the workers
+            pairs = []
+            for sign, i, j, s in self._run(self._list_align(a, b, node)):
+                xnode = node.descend(i) if node is not None else None
+                if sign == 0 and (s < 1 or not self._equal(a[i], b[j])) and self._value_diff(a[i], b[j], xnode) is None:
+                    pairs.append((a[i], b[j], xnode))
+            if len(pairs) >= threshold:
+                compare(pairs)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if not self._precomputed:
+                self._precomputed = None
+
+    def _picklable(self):
+        """
+        Tells whether the differ can be sent to worker processes.
+        """
+        try:
+            pickle.dumps(self)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            # e.g. a lambda list key
+            return False
+        return True
+
+    def diff_many(self, pairs, exclude_paths=None, executor=None, chunksize=64, ordered=True):
+        """
+        Computes the differences of many pairs of JSON structures with this differ, compiling exclude_paths once.
+        Pairs are read and diffed a chunk at a time as the results are consumed, on the executor if one is given.
+
+        :param pairs: An iterable of (a, b) pairs, as given to diff.
+        :param exclude_paths: Optional list of string paths to exclude from every diff.
+        :param executor: Optional concurrent.futures executor (thread or process pool) to diff the chunks on,
+            for the caller to reuse across calls. The differ must be picklable for a process pool.
+        :param chunksize: Number of pairs diffed by a single task.
+        :param ordered: Whether the diffs are yielded in the order of the pairs. Otherwise (index, diff) pairs
+            are yielded as the chunks are diffed.
+        :return: An iterator of diffs, or (index, diff) pairs unless ordered.
+        """
+        exclude_paths = _PathTrie.compile(exclude_paths, self.options.list_keys)
+        return self._run_chunks(_diff_chunk, pairs, exclude_paths, executor, chunksize, ordered)
+
+    def _run_chunks(self, fn, pairs, arg, executor, chunksize, ordered):
+        """
+        Yields the results of fn(differ, chunk, arg) for the successive chunks of pairs, run serially or on the
+        executor with up to _BATCH_IN_FLIGHT chunks submitted ahead, in order or as (index, result) pairs as
+        completed unless ordered.
+        """
+        pairs = iter(pairs)
+        chunks = enumerate(iter(lambda: list(itertools.islice(pairs, chunksize)), []))
+        if executor is None:
+            for k, chunk in chunks:
+                for i, r in enumerate(fn(self, chunk, arg), k * chunksize):
+                    yield r if ordered else (i, r)
+            return
+        # futures of the chunks submitted, by index of the first pair of each
+        pending = {}
+        for k, chunk in itertools.islice(chunks, _BATCH_IN_FLIGHT):
+            pending[executor.submit(fn, self, chunk, arg)] = k * chunksize
+        while pending:
+            if ordered:
+                future = next(iter(pending))
+                done = [future]
+                future.result()
+            else:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                start = pending.pop(future)
+                for k, chunk in itertools.islice(chunks, 1):
+                    pending[executor.submit(fn, self, chunk, arg)] = k * chunksize
+                for i, r in enumerate(future.result(), start):
+                    yield r if ordered else (i, r)
+
+    def diff_files(self, first, second, fp=None, exclude_paths=None):
+        """
+        Computes the difference between two JSON files, as diff does between the documents they hold, but
+        memory-mapping both files and comparing their bytes before parsing anything. Identical files are not
+        parsed, and when both files hold an object or an array, only the top-level items which are not the same
+        bytes at the same place from the start or from the end of both files are parsed and diffed. The bytes
+        left unparsed are not validated, and a list may be aligned differently than by diff where several
+        alignments are as good. The bytes_parsed, bytes_skipped, items_parsed and items_skipped
+        attributes count the input of the last call (items counted in both files), and parse_seconds the time
+        spent parsing and diffing the parsed bytes. The whole documents or their parsed items are loaded with
+        the loader option: a JsonLoader is given bytes, other loaders the str they decode to, and top-level
+        object keys are decoded as JSON strings.
+
+        :param first: The path of the original JSON file.
+        :param second: The path of the modified JSON file.
+        :param fp: Optional file pointer to dump the diff to.
+        :param exclude_paths: Optional list of string paths to exclude, as for diff.
+        :raise ValueError: The parsed bytes are not valid JSON.
+        """
+        with open(first, 'rb') as fa, open(second, 'rb') as fb, _mapped(fa) as A, _mapped(fb) as B:
+            a, b = self._load_mapped(A, B, exclude_paths)
+            start = time.perf_counter()
+            d = self._diff(a, b, exclude_paths)
+            if self.bytes_skipped and _holds_unchanged(d):
+                # the syntax emitted a whole document, holding items left unparsed
+                a, b = self._load_mapped(A, B, exclude_paths, whole=True)
+                start = time.perf_counter()
+                d = self._diff(a, b, exclude_paths)
+            self.parse_seconds += time.perf_counter() - start
 
         if self.options.dump:
             return self.options.dumper(d, fp)
         else:
             return d
 
-    def similarity(self, a, b):
+    def _load_mapped(self, A, B, exclude_paths, whole=False):
+        """
+        Loads the JSON documents in the bytes A and B for diff_files, unless whole, putting an _Unchanged
+        instance in both for each top-level item they share.
+        """
+        self.bytes_parsed, self.bytes_skipped = len(A) + len(B), 0
+        self.items_parsed = self.items_skipped = 0
+        self.parse_seconds = 0.0
+        start_a = _JSON_SPACE.match(A).end()
+        start_b = _JSON_SPACE.match(B).end()
+        kind = A[start_a:start_a + 1]
+        split = None
+        if not whole and kind in (b'{', b'[') and B[start_b:start_b + 1] == kind:
+            n = min(len(A), len(B))
+            prefix = _common_length(A, B, n)
+            if prefix == len(A) == len(B):
+                self.bytes_parsed, self.bytes_skipped = 0, len(A) + len(B)
+                return ({}, {}) if kind == b'{' else ([], [])
+            node = _PathTrie.compile(exclude_paths, self.options.list_keys)
+            # elements without a key would make keyed lists diffed by position
+            if kind == b'{' or self._list_key_function(node) is None:
+                suffix = _common_length(A, B, n - prefix, reverse=True)
+                split = _split_mapped(A, B, start_a, start_b, prefix, suffix)
+
+        loader = self.options.loader
+        if isinstance(loader, JsonLoader):
+            # bytes are parsed without decoding them first
+            loads = loader
+        else:
+            def loads(x):
+                return loader(x.decode())
+        start = time.perf_counter()
+        if split is None:
+            a, b = loads(A[:]), loads(B[:])
+            self.parse_seconds = time.perf_counter() - start
+            return a, b
+
+        items_a, items_b, lead, trail = split
+        unchanged = [_Unchanged() for _ in range(lead + trail)]
+
+        def entries(buf, items):
+            # (key, value bytes) of object items, (value bytes, value bytes) of array elements
+            if kind == b'[':
+                return [(buf[s:e].strip(),) * 2 for s, c, e in items]
+            return [(_load_key(buf[s:c]), buf[c + 1:e].strip()) for s, c, e in items]
+
+        # between the leading and trailing items, the items which are the same bytes in both (under the same
+        # key, in objects) are the same as well
+        middle_a = entries(A, items_a[lead:len(items_a) - trail])
+        middle_b = entries(B, items_b[lead:len(items_b) - trail])
+        values_a = dict(middle_a)
+        shared = {k: _Unchanged() for k, x in middle_b if values_a.get(k) == x}
+        del values_a
+
+        self.bytes_parsed = 0
+        docs = []
+        for middle in (middle_a, middle_b):
+            values = []
+            for k, x in middle:
+                v = shared.get(k)
+                if v is None:
+                    self.bytes_parsed += len(x)
+                    self.items_parsed += 1
+                    v = loads(x)
+                values.append(v)
+            if kind == b'[':
+                docs.append(unchanged[:lead] + values + unchanged[lead:])
+                continue
+            keys = [_load_key(A[s:c]) for s, c, e in items_a[:lead]] + [k for k, x in middle]
+            keys += [_load_key(A[s:c]) for s, c, e in items_a[len(items_a) - trail:]]
+            doc = dict(zip(keys, unchanged[:lead] + values + unchanged[lead:]))
+            if len(doc) < lead + len(middle) + trail:
+                # repeated keys, the last of which is kept whether it was parsed or not
+                return self._load_mapped(A, B, exclude_paths, whole=True)
+            docs.append(doc)
+        self.bytes_skipped = len(A) + len(B) - self.bytes_parsed
+        self.items_skipped = len(items_a) + len(items_b) - self.items_parsed
+        self.parse_seconds = time.perf_counter() - start
+        return docs
+
+    def iter_changes(self, a, b, exclude_paths=None, stream=False):
+        """
+        Yields the changes between two JSON structures as Change events while comparing them, instead of
+        building their diff. Changes to a dict come before changes nested in its values. List deletions give
+        positions in the original list, and insertions and nested changes positions in the modified list.
+        Inserted and deleted values are not diffed further, and neither are values whose types differ.
+
+        With stream, a and b are JSON text files, read in lockstep as they are compared, so that only the
+        parts that differ are ever loaded. Objects are compared key by key as long as both list their keys in
+        the same order, and arrays element by element, each element loaded whole, as long as their elements
+        are equal or similar. From the first keys or elements out of step, the rest of both objects or arrays
+        is loaded and compared as without stream. Changes nested in objects then come in the order of the
+        files.
+
+        The differ must not be used for anything else until the iteration ends.
+
+        :param a: The original JSON structure, or JSON text file with stream.
+        :param b: The modified JSON structure, or JSON text file with stream.
+        :param exclude_paths: Optional list of string paths to exclude, as for diff.
+        :param stream: Whether to read a and b as files as they are compared.
+        """
+        paths = _PathTrie.compile(exclude_paths, self.options.list_keys)
+        if stream:
+            return self._iter_stream_changes(_JsonReader(a), _JsonReader(b), paths)
+        if self.options.load:
+            a = self.options.loader(a)
+            b = self.options.loader(b)
+        return self._iter_changes(a, b, (), paths)
+
+    def _iter_changes(self, a, b, path, node):
+        """
+        Yields the changes between a and b, found at path and the path trie node.
+        """
+        with self._comparing(a, b):
+            # (path, a, b, node) of the pairs to compare, the next one last
+            stack = [(path, a, b, node)]
+            while stack:
+                path, a, b, node = stack.pop()
+                if (node is not None and node.excluded) or a is b:
+                    continue
+                if not _traversable(a, b):
+                    if a != b:
+                        yield Change(path, replace, a, b)
+                    continue
+                pending = []
+                if isinstance(a, dict):
+                    for k, v in a.items():
+                        child = node.descend(k) if node is not None else None
+                        if child is not None and child.excluded:
+                            continue
+                        w = b.get(k, missing)
+                        if w is missing:
+                            yield Change(path + (k,), delete, v, None)
+                        elif v is not w and (isinstance(v, _CONTAINER_TYPES) or v != w):
+                            pending.append((path + (k,), v, w, child))
+                    for k, w in b.items():
+                        if k not in a and (node is None or not node.excludes(k)):
+                            yield Change(path + (k,), insert, None, w)
+                elif isinstance(a, set):
+                    for x in a.difference(b):
+                        yield Change(path, discard, x, None)
+                    for y in b.difference(a):
+                        yield Change(path, add, None, y)
+                else:
+                    for sign, i, j, s in self._run(self._list_align(a, b, node)):
+                        if sign == 1:
+                            yield Change(path + (j,), insert, None, b[j])
+                        elif sign == -1:
+                            yield Change(path + (i,), delete, a[i], None)
+                        elif s < 1 or not self._equal(a[i], b[j]):
+                            pending.append((path + (j,), a[i], b[j], node.descend(i) if node is not None else None))
+                stack.extend(reversed(pending))
+
+    def _iter_stream_changes(self, A, B, paths):
+        """
+        Yields the changes between the JSON documents read by the _JsonReaders A and B.
+        """
+        # the containers open in both documents: [path, node] for objects, and for arrays
+        # [path, node, i, j, xs, ys] with the positions reached in each and their _ArrayLookaheads
+        stack = []
+        # the path and node of the values to compare next, if any
+        path, node = (), paths
+        while True:
+            if path is not None:
+                c = A.peek()
+                if node is not None and node.excluded:
+                    A.value()
+                    B.value()
+                elif c == B.peek() and c == '{':
+                    A.open()
+                    B.open()
+                    stack.append([path, node])
+                elif c == B.peek() and c == '[' and self._list_key_function(node) is None:
+                    A.open()
+                    B.open()
+                    stack.append([path, node, 0, 0, _ArrayLookahead(A), _ArrayLookahead(B)])
+                else:
+                    yield from self._iter_changes(A.value(), B.value(), path, node)
+                path = None
+            if not stack:
+                break
+            frame = stack[-1]
+            if len(frame) == 2:
+                fpath, fnode = frame
+                ka = A.key()
+                kb = B.key()
+                if ka == kb:
+                    if ka is missing:
+                        stack.pop()
+                    else:
+                        path = fpath + (ka,)
+                        node = fnode.descend(ka) if fnode is not None else None
+                    continue
+                # keys out of step, the rest of both objects is compared as a whole
+                yield from self._iter_changes(A.rest_object(ka), B.rest_object(kb), fpath, fnode)
+                stack.pop()
+                continue
+
+            fpath, fnode, i, j, xs, ys = frame
+            X = xs.fill(1)
+            Y = ys.fill(1)
+            if not X or not Y:
+                if not X and not Y:
+                    stack.pop()
+                elif X:
+                    yield Change(fpath + (i,), delete, X.popleft(), None)
+                    frame[2] += 1
+                else:
+                    yield Change(fpath + (j,), insert, None, Y.popleft())
+                    frame[3] += 1
+                continue
+            child = fnode.descend(i) if fnode is not None else None
+            if (child is not None and child.excluded) or X[0] == Y[0]:
+                X.popleft()
+                Y.popleft()
+                frame[2] += 1
+                frame[3] += 1
+                continue
+
+            # elements out of step, realigned on the nearest equal elements read ahead: the elements
+            # skipped on both sides are paired as modified, the others deleted or inserted
+            X = list(xs.fill(_STREAM_WINDOW))
+            Y = list(ys.fill(_STREAM_WINDOW))
+            p = q = None
+            for d in range(1, len(X) + len(Y) - 1):
+                for p in range(max(0, d - len(Y) + 1), min(d, len(X) - 1) + 1):
+                    q = d - p
+                    if X[p] == Y[q]:
+                        break
+                else:
+                    continue
+                break
+            else:
+                s = None
+                if _traversable(X[0], Y[0]):
+                    with self._comparing(X[0], Y[0]):
+                        s = self._obj_score(X[0], Y[0], _STREAM_MIN_SCORE, child)
+                if s is not None and s >= _STREAM_MIN_SCORE:
+                    p = q = 1
+                else:
+                    p = q = None
+            if p is None:
+                # nothing to realign on, the rest of both arrays is compared as a whole
+                X = xs.rest()
+                Y = ys.rest()
+                for change in self._iter_changes(X, Y, (), fnode.shifted(i) if fnode is not None else None):
+                    k = change.path[0] + (i if change.op is delete and len(change.path) == 1 else j)
+                    yield change._replace(path=fpath + (k,) + change.path[1:])
+                stack.pop()
+                continue
+            k = min(p, q)
+            for t in range(k):
+                tnode = fnode.descend(i + t) if fnode is not None else None
+                yield from self._iter_changes(X[t], Y[t], fpath + (j + t,), tnode)
+            for t in range(k, p):
+                yield Change(fpath + (i + t,), delete, X[t], None)
+            for t in range(k, q):
+                yield Change(fpath + (j + t,), insert, None, Y[t])
+            xs.drop(p)
+            ys.drop(q)
+            frame[2] += p
+            frame[3] += q
+        A.close()
+        B.close()
+
+    def write_changes(self, a, b, fp, exclude_paths=None, stream=False):
+        """
+        Writes the changes between two JSON structures to fp as they are found, one JSON object per line with
+        the path, op, old and new fields of the changes of iter_changes (old or new left out when they do not
+        apply), so that the memory used does not grow with the number of changes.
+
+        :param a: The original JSON structure, or JSON text file with stream.
+        :param b: The modified JSON structure, or JSON text file with stream.
+        :param fp: The text file or stream to write to.
+        :param exclude_paths: Optional list of string paths to exclude, as for diff.
+        :param stream: Whether to read a and b as files as they are compared, as for iter_changes.
+        :return: The number of changes written.
+        """
+        n = 0
+        for path, op, old, new in self.iter_changes(a, b, exclude_paths, stream):
+            event = {'path': list(path), 'op': op.label}
+            if op is not insert and op is not add:
+                event['old'] = old
+            if op is not delete and op is not discard:
+                event['new'] = new
+            fp.write(json.dumps(event))
+            fp.write('\n')
+            n += 1
+        return n
+
+    def similarity(self, a, b, min_score=None):
         """
         Calculates the similarity score between two JSON structures.
+
+        :param min_score: Optional threshold. The comparison stops as soon as the score is known to be below
+            it, which makes rejecting dissimilar structures much cheaper than scoring them.
+        :return: The similarity score, or None if min_score is given and the score is below it.
         """
         if self.options.load:
             a = self.options.loader(a)
             b = self.options.loader(b)
 
-        d, s = self._obj_diff(a, b)
+        with self._comparing(a, b) as paths:
+            s = self._obj_score(a, b, min_score, paths)
+        if min_score is not None and (s is None or s < min_score):
+            return None
+        return s
 
+    async def asimilarity(self, a, b, min_score=None, executor=None, yield_every=1000, time_slice=None):
+        """
+        Calculates the similarity score between two JSON structures as similarity does, yielding to the running
+        event loop as adiff does, or in the executor if one is given.
+        """
+        if executor is not None:
+            run = functools.partial(copy.copy(self).similarity, a, b, min_score)
+            return await asyncio.get_running_loop().run_in_executor(executor, run)
+        differ = self._cooperating()
+        if differ.options.load:
+            a = differ.options.loader(a)
+            b = differ.options.loader(b)
+
+        with differ._comparing(a, b) as paths:
+            s = differ._value_score(a, b, paths)
+            if s is None:
+                steps = differ._obj_score_steps(a, b, min_score, paths)
+                s = await differ._run_cooperatively(steps, yield_every, time_slice)
+        if min_score is not None and (s is None or s < min_score):
+            return None
         return s
 
-    def patch(self, a, d, fp=None):
+    def patch(self, a, d, fp=None, inplace=False):
         """
         Applies a diff to a JSON structure to produce the modified structure.
+
+        By default a is left untouched and shares its unchanged parts with the result. With inplace, a is
+        modified and returned (unless the diff replaces it as a whole), which saves copying the containers on
+        the paths to changes.
         """
         if self.options.load:
             a = self.options.loader(a)
             d = self.options.loader(d)
 
         if self.options.marshal or self.options.load:
-            d = self.unmarshal(d)
+            # only what was escaped is copied
+            d = _remap_lazily(d, self.options.escape_str, self._unescape)
 
-        b = self.options.syntax.patch(a, d)
+        if inplace:
+            b = self.options.syntax.patch(a, d, inplace=True)
+        else:
+            # custom syntaxes may predate inplace
+            b = self.options.syntax.patch(a, d)
 
         if self.options.dump:
             return self.options.dumper(b, fp)
         else:
             return b
 
-    def unpatch(self, b, d, fp=None):
+    async def apatch(self, a, d, fp=None, inplace=False, executor=None):
+        """
+        Applies a diff to a JSON structure as patch does, in the executor, or the default executor of the
+        running event loop if none is given, as patches have no nested comparisons to yield between.
+        """
+        run = functools.partial(self.patch, a, d, fp, inplace)
+        return await asyncio.get_running_loop().run_in_executor(executor, run)
+
+    def patch_many(self, pairs, inplace=False, executor=None, chunksize=64, ordered=True):
+        """
+        Applies many diffs to JSON structures with this differ, as diff_many computes them.
+
+        :param pairs: An iterable of (a, d) pairs, as given to patch.
+        :param inplace: Whether to modify the structures instead of copying the containers the diffs change.
+            Structures patched in a process pool are copies.
+        :param executor: Optional concurrent.futures executor to patch the chunks on.
+        :param chunksize: Number of pairs patched by a single task.
+        :param ordered: Whether the results are yielded in the order of the pairs, or as (index, result) pairs as
+            they are patched.
+        :return: An iterator of patched structures, or (index, structure) pairs unless ordered.
+        """
+        return self._run_chunks(_patch_chunk, pairs, inplace, executor, chunksize, ordered)
+
+    def unpatch(self, b, d, fp=None, inplace=False):
         """
         Reverses a diff on a JSON structure to produce the original structure.
+
+        As for patch, inplace modifies b instead of copying the containers on the paths to changes.
         """
         if self.options.load:
             b = self.options.loader(b)
             d = self.options.loader(d)
 
         if self.options.marshal or self.options.load:
-            d = self.unmarshal(d)
+            # only what was escaped is copied
+            d = _remap_lazily(d, self.options.escape_str, self._unescape)
 
-        a = self.options.syntax.unpatch(b, d)
+        if inplace:
+            a = self.options.syntax.unpatch(b, d, inplace=True)
+        else:
+            a = self.options.syntax.unpatch(b, d)
 
         if self.options.dump:
             return self.options.dumper(a, fp)
         else:
             return a
 
+    def compile_patch(self, d):
+        """
+        Compiles a diff to be applied to many structures. The diff is loaded, unmarshalled and walked once, into a
+        PatchProgram whose apply(a, fp=None, inplace=False) gives the same result as patch(a, d, fp, inplace).
+
+        :raise NotImplementedError: The syntax does not support compiled patches.
+        """
+        compile_patch = getattr(self.options.syntax, 'compile_patch', None)
+        if compile_patch is None:
+            raise NotImplementedError(f"{type(self.options.syntax).__name__} does not support compiled patches")
+
+        if self.options.load:
+            d = self.options.loader(d)
+
+        if self.options.marshal or self.options.load:
+            # only what was escaped is copied
+            d = _remap_lazily(d, self.options.escape_str, self._unescape)
+
+        ops, replacement = compile_patch(d)
+        return PatchProgram(ops, replacement, self.options)
+
     def _unescape(self, x):
         """
         Unescapes a string that has been escaped.
         """
-        if isinstance(x, str):
+        if isinstance(x, str) and x.startswith(self.options.escape_str):
             sym = self._symbol_map.get(x, None)
             if sym is not None:
                 return sym
-            if x.startswith(self.options.escape_str):
-                return x[1:]
+            return x[1:]
         return x
 
     def unmarshal(self, d):
         """
         Converts a marshaled (potentially escaped) structure back to its original form.
         """
-        if isinstance(d, dict):
-            return {
-                self._unescape(k): self.unmarshal(v)
-                for k, v in d.items()
-            }
-        elif isinstance(d, (list, tuple)):
-            return type(d)(
-                self.unmarshal(x)
-                for x in d
-            )
-        else:
-            return self._unescape(d)
+        return _rebuild(d, self._unescape, self._unescape)
 
     def _escape(self, o):
         """
@@ -1065,21 +3536,10 @@ class JsonDiffer:
         """
         Converts a structure to a marshaled (potentially escaped) form.
         """
-        if isinstance(d, dict):
-            return {
-                self._escape(k): self.marshal(v)
-                for k, v in d.items()
-            }
-        elif isinstance(d, (list, tuple)):
-            return type(d)(
-                self.marshal(x)
-                for x in d
-            )
-        else:
-            return self._escape(d)
+        return _rebuild(d, self._escape, self._escape)
 
 
-def diff(a, b, fp=None, cls=JsonDiffer, **kwargs):
+def diff(a, b, fp=None, cls=JsonDiffer, exclude_paths=None, workers=None, **kwargs):
     """
     Computes the difference between two JSON structures using a specified JsonDiffer class.
 
@@ -1087,13 +3547,66 @@ def diff(a, b, fp=None, cls=JsonDiffer, **kwargs):
     :param b: The modified JSON structure.
     :param fp: Optional file pointer to dump the diff to.
     :param cls: The JsonDiffer class or subclass to use for computing the diff.
+    :param exclude_paths: Optional list of string paths to exclude from the diff.
+    :param workers: Optional number of worker processes to diff the top-level structures with.
+    :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
+    :return: The computed diff.
+    """
+    return cls(**kwargs).diff(a, b, fp, exclude_paths, workers)
+
+
+def diff_files(first, second, fp=None, cls=JsonDiffer, exclude_paths=None, **kwargs):
+    """
+    Computes the difference between two JSON files, parsing only what differs, using a specified JsonDiffer class.
+
+    :param first: The path of the original JSON file.
+    :param second: The path of the modified JSON file.
+    :param fp: Optional file pointer to dump the diff to.
+    :param cls: The JsonDiffer class or subclass to use for computing the diff.
+    :param exclude_paths: Optional list of string paths to exclude from the diff.
     :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
     :return: The computed diff.
     """
-    return cls(**kwargs).diff(a, b, fp)
+    return cls(**kwargs).diff_files(first, second, fp, exclude_paths)
+
+
+def diff_many(pairs, cls=JsonDiffer, exclude_paths=None, executor=None, chunksize=64, ordered=True, **kwargs):
+    """
+    Computes the differences of many pairs of JSON structures with a single differ of a specified JsonDiffer class.
+
+    :param pairs: An iterable of (a, b) pairs.
+    :param cls: The JsonDiffer class or subclass to use for computing the diffs.
+    :param exclude_paths: Optional list of string paths to exclude from every diff.
+    :param executor: Optional concurrent.futures executor to diff the pairs on.
+    :param chunksize: Number of pairs diffed by a single task.
+    :param ordered: Whether the diffs are yielded in order, or as (index, diff) pairs as they are computed.
+    :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
+    :return: An iterator of diffs.
+    """
+    return cls(**kwargs).diff_many(pairs, exclude_paths, executor, chunksize, ordered)
 
 
-def patch(a, d, fp=None, cls=JsonDiffer, **kwargs):
+async def adiff(a, b, fp=None, cls=JsonDiffer, exclude_paths=None, executor=None, yield_every=1000, time_slice=None,
+                **kwargs):
+    """
+    Computes the difference between two JSON structures using a specified JsonDiffer class, yielding to the
+    running event loop meanwhile.
+
+    :param a: The original JSON structure.
+    :param b: The modified JSON structure.
+    :param fp: Optional file pointer to dump the diff to.
+    :param cls: The JsonDiffer class or subclass to use for computing the diff.
+    :param exclude_paths: Optional list of string paths to exclude from the diff.
+    :param executor: Optional concurrent.futures executor to compute the diff in instead.
+    :param yield_every: Number of nested comparisons run between yields to the loop.
+    :param time_slice: Optional time in seconds after which to yield to the loop.
+    :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
+    :return: The difference between the two JSON structures.
+    """
+    return await cls(**kwargs).adiff(a, b, fp, exclude_paths, executor, yield_every, time_slice)
+
+
+def patch(a, d, fp=None, cls=JsonDiffer, inplace=False, **kwargs):
     """
     Applies a diff to a JSON structure to produce the modified structure using a specified JsonDiffer class.
 
@@ -1101,29 +3614,120 @@ def patch(a, d, fp=None, cls=JsonDiffer, **kwargs):
     :param d: The diff to apply.
     :param fp: Optional file pointer to dump the patched structure to.
     :param cls: The JsonDiffer class or subclass to use for applying the diff.
+    :param inplace: Whether to modify a instead of copying the containers the diff changes.
     :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
     :return: The patched JSON structure.
     """
-    return cls(**kwargs).patch(a, d, fp)
+    return cls(**kwargs).patch(a, d, fp, inplace)
 
 
-def similarity(a, b, cls=JsonDiffer, **kwargs):
+async def apatch(a, d, fp=None, cls=JsonDiffer, inplace=False, executor=None, **kwargs):
+    """
+    Applies a diff to a JSON structure in an executor using a specified JsonDiffer class.
+
+    :param a: The original JSON structure.
+    :param d: The diff to apply.
+    :param fp: Optional file pointer to dump the result to.
+    :param cls: The JsonDiffer class or subclass to use for applying the diff.
+    :param inplace: Whether to modify a instead of copying the containers the diff changes.
+    :param executor: Optional concurrent.futures executor, the default executor of the running loop otherwise.
+    :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
+    :return: The modified JSON structure.
+    """
+    return await cls(**kwargs).apatch(a, d, fp, inplace, executor)
+
+
+def patch_many(pairs, cls=JsonDiffer, inplace=False, executor=None, chunksize=64, ordered=True, **kwargs):
+    """
+    Applies many diffs to JSON structures with a single differ of a specified JsonDiffer class.
+
+    :param pairs: An iterable of (a, d) pairs.
+    :param cls: The JsonDiffer class or subclass to use for applying the diffs.
+    :param inplace: Whether to modify the structures instead of copying the containers the diffs change.
+    :param executor: Optional concurrent.futures executor to patch the pairs on.
+    :param chunksize: Number of pairs patched by a single task.
+    :param ordered: Whether the results are yielded in order, or as (index, result) pairs as they are patched.
+    :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
+    :return: An iterator of patched structures.
+    """
+    return cls(**kwargs).patch_many(pairs, inplace, executor, chunksize, ordered)
+
+
+def compile_patch(d, cls=JsonDiffer, **kwargs):
+    """
+    Compiles a diff to be applied to many JSON structures using a specified JsonDiffer class.
+
+    :param d: The diff to compile.
+    :param cls: The JsonDiffer class or subclass to use for compiling the diff.
+    :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
+    :return: A PatchProgram, whose apply method patches a structure.
+    """
+    return cls(**kwargs).compile_patch(d)
+
+
+def iter_changes(a, b, cls=JsonDiffer, exclude_paths=None, stream=False, **kwargs):
+    """
+    Yields the changes between two JSON structures as they are found using a specified JsonDiffer class.
+
+    :param a: The original JSON structure, or JSON text file with stream.
+    :param b: The modified JSON structure, or JSON text file with stream.
+    :param cls: The JsonDiffer class or subclass to use for comparing the structures.
+    :param exclude_paths: Optional list of string paths to exclude from the changes.
+    :param stream: Whether to read a and b as files as they are compared.
+    :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
+    :return: An iterator of Change events.
+    """
+    return cls(**kwargs).iter_changes(a, b, exclude_paths, stream)
+
+
+def similarity(a, b, cls=JsonDiffer, min_score=None, **kwargs):
     """
     Calculates the similarity score between two JSON structures using a specified JsonDiffer class.
 
     :param a: The first JSON structure.
     :param b: The second JSON structure.
     :param cls: The JsonDiffer class or subclass to use for calculating similarity.
+    :param min_score: Optional threshold below which the comparison is abandoned early.
+    :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
+    :return: A similarity score as a float between 0.0 and 1.0, or None if it is below min_score.
+    """
+    return cls(**kwargs).similarity(a, b, min_score)
+
+
+async def asimilarity(a, b, cls=JsonDiffer, min_score=None, executor=None, yield_every=1000, time_slice=None,
+                      **kwargs):
+    """
+    Calculates the similarity score between two JSON structures using a specified JsonDiffer class, yielding to
+    the running event loop meanwhile.
+
+    :param a: The first JSON structure.
+    :param b: The second JSON structure.
+    :param cls: The JsonDiffer class or subclass to use for calculating similarity.
+    :param min_score: Optional threshold below which the comparison is abandoned early.
+    :param executor: Optional concurrent.futures executor to calculate the score in instead.
+    :param yield_every: Number of nested comparisons run between yields to the loop.
+    :param time_slice: Optional time in seconds after which to yield to the loop.
     :param kwargs: Additional keyword arguments to pass to the JsonDiffer constructor.
-    :return: A similarity score as a float between 0.0 and 1.0.
+    :return: A similarity score as a float between 0.0 and 1.0, or None if it is below min_score.
     """
-    return cls(**kwargs).similarity(a, b)
+    return await cls(**kwargs).asimilarity(a, b, min_score, executor, yield_every, time_slice)
 
 
 __all__ = [
     "similarity",
+    "asimilarity",
     "diff",
+    "adiff",
+    "diff_files",
+    "diff_many",
+    "apatch",
+    "patch_many",
+    "compile_patch",
+    "iter_changes",
+    "Change",
+    "PatchProgram",
     "JsonDiffer",
+    "JsonBackend",
     "JsonDumper",
     "JsonLoader",
     "YamlDumper",
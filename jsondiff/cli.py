@@ -1,9 +1,11 @@
 import argparse
 import jsondiff
 import sys
+import time
 
 def load_file(serializer, file_path):
-    with open(file_path) as f:
+    # json backends parse bytes without decoding them first
+    with open(file_path, "rb" if serializer.file_format == "json" else "r") as f:
         parsed = None
         try:
             parsed = serializer.deserialize_file(f)
@@ -13,6 +15,45 @@ def load_file(serializer, file_path):
             print(f"{file_path} does not exist")
     return parsed
 
+def stream_diff(first, second):
+    try:
+        with open(first) as a, open(second) as b:
+            jsondiff.JsonDiffer().write_changes(a, b, sys.stdout, stream=True)
+    except ValueError as ex:
+        print(f"Invalid json input: {ex}")
+        return 1
+    except FileNotFoundError as ex:
+        print(f"{ex.filename} does not exist")
+        return 1
+    return 0
+
+def diff_files(first, second, syntax, json_backend):
+    differ = jsondiff.JsonDiffer(syntax=syntax, marshal=True, loader=jsondiff.JsonLoader(json_backend))
+    start = time.perf_counter()
+    try:
+        x = differ.diff_files(first, second)
+    except ValueError as ex:
+        print(f"Invalid json input: {ex}")
+        return differ, None, None
+    except FileNotFoundError as ex:
+        print(f"{ex.filename} does not exist")
+        return differ, None, None
+    return differ, x, time.perf_counter() - start
+
+def print_stats(differ, elapsed):
+    total = differ.bytes_parsed + differ.bytes_skipped
+    stats = f"{differ.bytes_parsed} of {total} bytes"
+    if differ.items_parsed or differ.items_skipped:
+        stats += f" and {differ.items_parsed} of {differ.items_parsed + differ.items_skipped} top-level items"
+    stats += f" parsed and diffed in {elapsed:.3f}s"
+    if differ.bytes_parsed and differ.bytes_skipped:
+        # assuming the skipped bytes would have taken as long to parse and diff as the others
+        saved = differ.parse_seconds * differ.bytes_skipped / differ.bytes_parsed
+        stats += f", an estimated {saved:.3f}s saved"
+    elif differ.bytes_skipped:
+        stats += ", identical files not parsed"
+    print(stats, file=sys.stderr)
+
 def main():
     parser = argparse.ArgumentParser(formatter_class=argparse.ArgumentDefaultsHelpFormatter)
 
@@ -24,11 +65,50 @@ def main():
     parser.add_argument("-i", "--indent", action="store", type=int, default=None,
                         help="Number of spaces to indent. None is compact, no indentation.")
     parser.add_argument("-f", "--format", choices=("json", "yaml"), default="json",
-                        help="Specify file format for input and dump")
+                        help="Specify file format for input and dump. YAML is read and written with the "
+                             f"{jsondiff.yaml_implementation} implementation of PyYAML")
+    parser.add_argument("--multi-document", action="store_true", default=False,
+                        help="Load YAML files as the lists of their documents, e.g. Kubernetes manifests")
+    parser.add_argument("--json-backend", choices=tuple(jsondiff.json_backends), default="json",
+                        help="JSON library to load and dump with, e.g. the fastest available "
+                             f"({jsondiff.default_json_backend})")
+    parser.add_argument("--stream", action="store_true", default=False,
+                        help="Compare JSON files as they are read, loading only the parts that differ, and "
+                             "write the changes as they are found, one JSON object per line")
+    parser.add_argument("--skip-shared", action="store_true", default=False,
+                        help="Compare JSON files byte by byte first, parsing and diffing only the top-level items "
+                             "that differ. The bytes the files share are not checked to be valid JSON")
+    parser.add_argument("--stats", action="store_true", default=False,
+                        help="Report how much of the JSON files was parsed with --skip-shared and the time saved "
+                             "on stderr")
 
     args = parser.parse_args()
 
-    serializer = jsondiff.Serializer(args.format, args.indent)
+    if args.multi_document and (args.patch or args.format != "yaml"):
+        parser.error("--multi-document only compares YAML files")
+
+    if args.stream:
+        if args.patch or args.format != "json":
+            parser.error("--stream only compares JSON files")
+        return stream_diff(args.first, args.second)
+
+    if args.skip_shared and (args.patch or args.format != "json"):
+        parser.error("--skip-shared only compares JSON files")
+
+    if args.stats and not args.skip_shared:
+        parser.error("--stats only reports on diffs with --skip-shared")
+
+    if args.skip_shared:
+        # the files are compared byte by byte first, parsing only the parts that differ
+        differ, x, elapsed = diff_files(args.first, args.second, args.syntax, args.json_backend)
+        if elapsed is None:
+            return 1
+        if args.stats:
+            print_stats(differ, elapsed)
+        jsondiff.Serializer(args.format, args.indent, args.json_backend).serialize_data(x, sys.stdout)
+        return 0
+
+    serializer = jsondiff.Serializer(args.format, args.indent, args.json_backend, args.multi_document)
 
     parsed_first = load_file(serializer, args.first)
     parsed_second = load_file(serializer, args.second)
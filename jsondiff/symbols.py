@@ -22,8 +22,18 @@ class Symbol:
     These symbols help in succinctly representing changes in a structured way, making it easier to apply or revert
     changes programmatically.
     """
-    def __init__(self, label):
-        self._label = label
+    # instances are interned: there is one Symbol per label, so that the identity comparison and hashing that
+    # objects get by default are all equality needs, without calling back into Python code
+    __slots__ = ('_label',)
+
+    def __new__(cls, label):
+        try:
+            return _symbols[label]
+        except KeyError:
+            pass
+        symbol = super().__new__(cls)
+        symbol._label = label
+        return _symbols.setdefault(label, symbol)
 
     @property
     def label(self):
@@ -35,14 +45,13 @@ class Symbol:
     def __str__(self):
         return "$" + self.label
 
-    def __eq__(self, other):
-        if not isinstance(other, Symbol):
-            return False
-        return self.label == other.label
+    def __reduce__(self):
+        # unpickled and copied symbols are the interned ones
+        return Symbol, (self._label,)
 
-    def __hash__(self) -> int:
-        return hash(self.label)
 
+# interned symbols, by label
+_symbols = {}
 
 missing = Symbol('missing')
 identical = Symbol('identical')
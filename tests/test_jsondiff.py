@@ -1,12 +1,23 @@
+import asyncio
+import collections
+import concurrent.futures
+import copy
 import io
+import itertools
+import json
 import logging
 import os.path
+import pickle
+import random
 import sys
+import tempfile
 import unittest
+import unittest.mock
 import pytest
+import yaml
 
 import jsondiff
-from jsondiff import diff, replace, add, discard, insert, delete, JsonDiffer
+from jsondiff import diff, diff_many, patch_many, similarity, replace, add, discard, insert, delete, JsonDiffer
 
 from .utils import generate_random_json, perturbate_json
 
@@ -34,6 +45,31 @@ def generate_scenario_no_sets(rng):
     return a, b
 
 
+class CountingDiffer(JsonDiffer):
+    """Counts the traversals of each pair of compared containers, and of those diffing them, by id() pair"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.traversals = collections.Counter()
+        self.diffed = collections.Counter()
+
+    def _obj_diff_steps(self, a, b, node=None):
+        self.traversals[id(a), id(b)] += 1
+        self.diffed[id(a), id(b)] += 1
+        return super()._obj_diff_steps(a, b, node)
+
+    def _obj_score_steps(self, a, b, min_score=None, node=None):
+        self.traversals[id(a), id(b)] += 1
+        return super()._obj_score_steps(a, b, min_score, node)
+
+
+class MatrixDiffer(JsonDiffer):
+    """Aligns lists with the LCS matrix of the whole lists, without trimming their ends or anchoring them"""
+
+    def _list_align(self, X, Y, node=None, diffs=None):
+        return (yield from self._list_diff_block(X, Y, 0, len(X), 0, len(Y), node))
+
+
 class JsonDiffTests(unittest.TestCase):
 
     def test_a(self):
@@ -95,6 +131,41 @@ class JsonDiffTests(unittest.TestCase):
 
         self.assertEqual(d, differ.unmarshal(dm))
 
+    @given(strategies.randoms().map(generate_scenario))
+    @settings(max_examples=1000)
+    def test_marshaled_diff(self, scenario):
+        a, b = scenario
+        for syntax in ('compact', 'symmetric', 'explicit', 'rightonly'):
+            differ = JsonDiffer(syntax=syntax)
+            self.assertEqual(differ.marshal(differ.diff(a, b)), JsonDiffer(syntax=syntax, marshal=True).diff(a, b))
+
+    def test_marshaled_diff_copies_escaped_values_only(self):
+        a = {'a': 1}
+        b = {'a': 2, 'plain': {'x': [1, 'y']}, 'escaped': {'x': ['$y', 'z']}}
+        d = diff(a, b, marshal=True)
+        self.assertEqual({'a': 2, 'plain': {'x': [1, 'y']}, 'escaped': {'x': ['$$y', 'z']}}, d)
+        self.assertIs(b['plain'], d['plain'])
+        self.assertEqual('$y', b['escaped']['x'][0])
+
+    def test_marshaled_patch_copies_escaped_values_only(self):
+        plain = {'x': [1, 'y']}
+        d = {'$insert': [[0, plain], [1, {'x': ['$$y']}]], '$delete': [0]}
+        b = jsondiff.patch([0], d, marshal=True)
+        self.assertEqual([plain, {'x': ['$y']}], b)
+        self.assertIs(plain, b[0])
+        self.assertEqual(['$$y'], d['$insert'][1][1]['x'])
+
+    def test_symbols(self):
+        from jsondiff.symbols import Symbol
+        self.assertIs(delete, Symbol('delete'))
+        self.assertIs(delete, pickle.loads(pickle.dumps(delete)))
+        self.assertIs(delete, copy.deepcopy(delete))
+        self.assertNotEqual(delete, 'delete')
+        self.assertNotEqual(delete, insert)
+        d = diff([1, 2, 3], [0, 2, 3, 4])
+        self.assertEqual(d, pickle.loads(pickle.dumps(d)))
+        self.assertEqual([0, 2, 3, 4], jsondiff.patch([1, 2, 3], pickle.loads(pickle.dumps(d))))
+
     @given(strategies.randoms().map(generate_scenario_no_sets))
     @settings(max_examples=1000)
     def test_dump(self, scenario):
@@ -135,6 +206,282 @@ class JsonDiffTests(unittest.TestCase):
         dm = differ.marshal(d)
         self.assertEqual(d, differ.unmarshal(dm))
 
+    @given(strategies.randoms().map(generate_scenario))
+    @settings(max_examples=1000)
+    def test_inplace_patch(self, scenario):
+        a, b = scenario
+        for syntax in ('compact', 'symmetric'):
+            differ = JsonDiffer(syntax=syntax)
+            d = differ.diff(a, b)
+            original = copy.deepcopy(a)
+            self.assertEqual(b, differ.patch(a, d))
+            self.assertEqual(original, a)
+            self.assertEqual(b, differ.patch(original, d, inplace=True))
+        modified = copy.deepcopy(b)
+        self.assertEqual(a, differ.unpatch(modified, d, inplace=True))
+
+    def test_inplace_patch_modifies_containers(self):
+        a = {'a': [1, 2, 3], 'b': {'c': 1}, 's': {1, 2}, 't': (1, [2])}
+        b = {'a': [1, 3, 4], 'b': {'c': 2}, 's': {2, 3}, 't': (1, [3])}
+        lst, dct, st = a['a'], a['b'], a['s']
+        d = diff(a, b)
+        self.assertIs(a, jsondiff.patch(a, d, inplace=True))
+        self.assertEqual(b, a)
+        self.assertIs(lst, a['a'])
+        self.assertIs(dct, a['b'])
+        self.assertIs(st, a['s'])
+
+    def test_patch_shares_unchanged_containers(self):
+        a = {'a': [1, 2, 3], 'b': {'c': 1}, 'd': {'e': [1]}}
+        b = {'a': [1, 2, 3], 'b': {'c': 2}, 'd': {'e': [1]}}
+        patched = jsondiff.patch(a, diff(a, b))
+        self.assertEqual(b, patched)
+        self.assertEqual({'c': 1}, a['b'])
+        self.assertIs(a['a'], patched['a'])
+        self.assertIs(a['d'], patched['d'])
+
+    def test_patch_list_edits(self):
+        a = list(range(1000))
+        b = [x for x in a if x % 3] + [-1]
+        b[10:10] = ['x', 'y']
+        for syntax in ('compact', 'symmetric'):
+            differ = JsonDiffer(syntax=syntax)
+            d = differ.diff(a, b)
+            self.assertEqual(b, differ.patch(a, d))
+            self.assertEqual(tuple(b), differ.patch(tuple(a), d, inplace=True))
+        self.assertEqual(a, differ.unpatch(b, d))
+        self.assertEqual(a, differ.unpatch(list(b), d, inplace=True))
+        # positions in another order than diffs list them are applied one by one
+        self.assertEqual([1, 'a', 3, 'b'], jsondiff.patch([0, 1, 2, 3], {delete: [0, 1], insert: [(2, 'b'), (1, 'a')]}))
+
+    @given(strategies.randoms().map(generate_scenario))
+    @settings(max_examples=1000)
+    def test_compile_patch(self, scenario):
+        a, b = scenario
+        for syntax in ('compact', 'symmetric', 'rightonly'):
+            differ = JsonDiffer(syntax=syntax)
+            d = differ.diff(a, b)
+            program = differ.compile_patch(d)
+            self.assertEqual(b, program.apply(a))
+            self.assertEqual(b, program.apply(a))
+            self.assertEqual(b, program.apply(copy.deepcopy(a), inplace=True))
+
+    def test_compile_patch_options(self):
+        differ = JsonDiffer(load=True, dump=True)
+        program = differ.compile_patch('{"a": {"$delete": [0]}, "$delete": ["b"]}')
+        self.assertEqual('{"a": [2], "c": 3}', program.apply('{"a": [1, 2], "b": 2, "c": 3}'))
+        program = jsondiff.compile_patch({'$$a': 1, '$delete': ['$$b']}, marshal=True)
+        self.assertEqual({'$a': 1}, program.apply({'$b': 2}))
+        self.assertEqual(5, jsondiff.compile_patch({replace: 5}).apply({'a': 1}))
+        with self.assertRaises(NotImplementedError):
+            JsonDiffer(syntax='explicit').compile_patch({})
+
+    @given(strategies.randoms().map(generate_scenario))
+    @settings(max_examples=1000)
+    def test_hirschberg_list_algorithm(self, scenario):
+        a, b = scenario
+        differ = JsonDiffer(syntax='symmetric', list_algorithm='hirschberg')
+        d = differ.diff(a, b)
+        self.assertEqual(b, differ.patch(a, d))
+        self.assertEqual(a, differ.unpatch(b, d))
+        self.assertAlmostEqual(JsonDiffer().similarity(a, b), differ.similarity(a, b))
+
+    @given(strategies.randoms().map(generate_scenario))
+    @settings(max_examples=1000)
+    def test_similarity_matches_diff_score(self, scenario):
+        a, b = scenario
+        differ = JsonDiffer()
+        _, s = differ._obj_diff(a, b)
+        self.assertEqual(s, differ.similarity(a, b))
+
+    def test_similarity_min_score(self):
+        a = {'a': 1, 'b': [1, 2, 3], 'c': {'d': 4}}
+        b = {'a': 1, 'b': [1, 2, 4], 'c': {'d': 5}}
+        s = jsondiff.similarity(a, b)
+        self.assertEqual(s, jsondiff.similarity(a, b, min_score=s))
+        self.assertIsNone(jsondiff.similarity(a, b, min_score=0.99))
+        self.assertIsNone(jsondiff.similarity([1, 2, 3, 4], [1], min_score=0.5))
+        self.assertIsNone(jsondiff.similarity({1, 2, 3}, {4, 5, 6}, min_score=0.5))
+        self.assertEqual(1.0, jsondiff.similarity(a, a, min_score=1.0))
+
+    def test_set_similarity_pairs_tuples(self):
+        a = {(1, 2, 3), (4, 5, 6), 'a', 7}
+        b = {(1, 2, 0), (4, 5, 6), 'b', 8}
+        # (4, 5, 6) is common and (1, 2, 3) / (1, 2, 0) pair up with a score of 0.5
+        self.assertAlmostEqual(1.5 / 7, jsondiff.similarity(a, b))
+        self.assertIsNone(jsondiff.similarity(a, b, min_score=0.5))
+
+        # tuples pair with tuples of the same length first, then with the ones left over of any length
+        self.assertEqual(0.25, jsondiff.similarity({(1, 2, 3), (1, 2)}, {(1, 2, 4), (1, 2, 3, 5)}))
+        self.assertEqual(0.25, jsondiff.similarity({(1, 2, 3), (7, 8)}, {(1, 2, 3, 4)}))
+        # every pair scores 1/3, the tuples whose few candidates kept were taken pair with the others left
+        a = {(0, i) for i in range(10)}
+        b = {(0, -i) for i in range(1, 11)}
+        self.assertAlmostEqual(10 / 3 / 20, jsondiff.similarity(a, b))
+
+    def test_list_trimming_and_anchors(self):
+        a = [1, 2, 3, 4, 5]
+        b = [1, 2, 'x', 4, 5, 6]
+        self.assertEqual({insert: [(2, 'x'), (5, 6)], delete: [2]}, diff(a, b))
+        d = diff(a, b, syntax='symmetric')
+        self.assertEqual({insert: [(2, 'x'), (5, 6)], delete: [(2, 3)]}, d)
+        self.assertEqual(a, jsondiff.JsonDiffer(syntax='symmetric').unpatch(b, d))
+
+        a = ['a', {'v': 1}, 'b', 'c', {'v': 2}, 'd']
+        b = ['a', {'v': 3}, 'c', 'b', {'v': 2}, 'd']
+        d = diff(a, b)
+        self.assertEqual({1: {'v': 3}, insert: [(3, 'b')], delete: [2]}, d)
+        self.assertEqual(b, jsondiff.patch(a, d))
+        self.assertEqual(d, diff(a, b, list_algorithm='patience'))
+
+        # trimming keeps the alignment of the whole lists, where the leading elements are matched differently
+        self.assertEqual({delete: [0]}, diff([None, None], [None]))
+        self.assertEqual({insert: [(1, 'z')], delete: [2, 0]}, diff(['x', 'x', 'y'], ['x', 'z']))
+
+        # anchors crossing each other may lower the similarity
+        a = ('\n', '(b.{c', None, False, None, True, False)
+        b = (True, '(b.{c', None, None, False)
+        self.assertEqual({insert: [(0, True)], delete: [5, 3, 0]}, diff(a, b))
+        self.assertEqual(0.5, similarity(a, b))
+        self.assertEqual({insert: [(1, '(b.{c'), (2, None), (3, None)], delete: [4, 3, 2, 1, 0]},
+                         diff(a, b, list_algorithm='patience'))
+        self.assertEqual(0.2, similarity(a, b, list_algorithm='patience'))
+
+    @given(strategies.randoms().map(generate_scenario))
+    @settings(max_examples=1000)
+    def test_list_trimming_keeps_lcs(self, scenario):
+        a, b = scenario
+        for syntax in ('compact', 'symmetric'):
+            differ = JsonDiffer(syntax=syntax)
+            expected = MatrixDiffer(syntax=syntax)
+            self.assertEqual(expected.similarity(a, b), differ.similarity(a, b))
+            self.assertEqual(expected.diff(a, b), differ.diff(a, b))
+
+    @given(strategies.randoms().map(generate_scenario))
+    @settings(max_examples=1000)
+    def test_hash_index(self, scenario):
+        a, b = scenario
+        differ = JsonDiffer(syntax='symmetric', hash_index=True)
+        d = differ.diff(a, b)
+        self.assertEqual(b, differ.patch(a, d))
+        self.assertEqual(a, differ.unpatch(b, d))
+
+    def test_hash_index_equal_subtrees(self):
+        a = [{'id': i, 'tags': ['x', i]} for i in range(50)]
+        b = [{'id': i, 'tags': ['x', i]} for i in range(50)]
+        b[10] = {'id': 10, 'tags': ['y', 10]}
+        b.append({'id': 50})
+        differ = JsonDiffer(hash_index=True)
+        self.assertEqual({10: {'tags': {insert: [(0, 'y')], delete: [0]}}, insert: [(50, {'id': 50})]},
+                         differ.diff(a, b))
+        self.assertEqual(JsonDiffer().similarity(a, b), differ.similarity(a, b))
+
+        # colliding hashes still have to compare equal
+        x, y = [1], [2]
+        differ._hashes = {id(x): 0, id(y): 0}
+        self.assertFalse(differ._equal(x, y))
+
+    def test_score_cache(self):
+        a = [[[i, j] for j in range(6)] for i in range(6)]
+        b = [[[i, j + 1] for j in range(6)] for i in range(6)]
+        expected = diff(a, b, list_algorithm='hirschberg')
+        differ = JsonDiffer(list_algorithm='hirschberg', cache_size=10000)
+        self.assertEqual(expected, differ.diff(a, b))
+        self.assertGreater(differ.cache_hits, 0)
+        self.assertGreater(differ.cache_misses, 0)
+
+        small = JsonDiffer(list_algorithm='hirschberg', cache_size=4)
+        self.assertEqual(expected, small.diff(a, b))
+        self.assertEqual(JsonDiffer().similarity(a, b), small.similarity(a, b))
+
+    def test_list_keys(self):
+        a = [{'id': 1, 'v': 1}, {'id': 2, 'v': 2}, {'id': 3, 'v': 3}]
+        b = [{'id': 1, 'v': 10}, {'id': 3, 'v': 3}, {'id': 4}]
+        self.assertEqual({0: {'v': 10}, insert: [(2, {'id': 4})], delete: [1]}, diff(a, b, list_keys='id'))
+
+        # id 3 moved to the front, which is reported as a delete and an insert
+        b = [{'id': 3, 'v': 3}, {'id': 1, 'v': 10}, {'id': 4}]
+        differ = JsonDiffer(syntax='symmetric', list_keys=lambda x: x['id'])
+        d = differ.diff(a, b)
+        self.assertEqual(b, differ.patch(a, d))
+        self.assertEqual(a, differ.unpatch(b, d))
+
+        # per path keys, the other lists are diffed by position
+        a = {'records': a, 'other': [{'id': 1}, {'id': 2}]}
+        b = {'records': b, 'other': [{'id': 2}, {'id': 1}]}
+        d = diff(a, b, list_keys={'records': 'id'})
+        self.assertEqual({0: {'id': 2}, 1: {'id': 1}}, d['other'])
+        self.assertEqual(b, jsondiff.patch(a, d))
+        differ = JsonDiffer(list_keys={'records': 'id'})
+        with differ._comparing(a, b) as paths:
+            _, s = differ._obj_diff(a, b, paths)
+        self.assertEqual(s, differ.similarity(a, b))
+
+        # repeated keys fall back to positional diffing
+        a = [{'id': 1, 'v': 1}, {'id': 1, 'v': 2}]
+        b = [{'id': 1, 'v': 2}]
+        self.assertEqual(diff(a, b), diff(a, b, list_keys='id'))
+
+    def test_list_keys_traverse_pairs_once(self):
+        a = [{'id': i, 'v': [i, {'w': i}]} for i in range(10)]
+        b = [dict(x, v=[x['id'], {'w': -1}]) if x['id'] % 3 == 0 else dict(x) for x in a[1:]] + [{'id': 20}]
+        for syntax in ('compact', 'symmetric', 'rightonly'):
+            differ = CountingDiffer(syntax=syntax, list_keys='id')
+            d = differ.diff(a, b)
+            self.assertEqual(JsonDiffer(syntax=syntax).patch(a, d), b)
+            self.assertEqual({1}, set(differ.traversals.values()))
+            self.assertIn((id(a[3]), id(b[2])), differ.traversals)
+
+    def test_list_lcs_compares_pairs_once(self):
+        a = [{'id': 1, 'items': [{'n': 1}, {'n': 2, 'tags': ['x', 'y']}]},
+             {'id': 2, 'items': [{'n': 3}]},
+             [{'k': 1}, {'k': 2, 'v': [1, 2]}],
+             {'id': 4}]
+        b = [{'id': 2, 'items': [{'n': 3}, {'n': 4}]},
+             {'id': 1, 'items': [{'n': 2, 'tags': ['y', 'z']}]},
+             [{'k': 2, 'v': [1, 2, 3]}],
+             {'id': 5},
+             {'id': 6}]
+        expected = {
+            'compact': {
+                0: {'id': 2, 'items': {0: {'n': 3}, 1: {'n': 4, delete: ['tags']}}},
+                1: {'id': 1, 'items': {0: {'n': 2, 'tags': ['y', 'z']}}},
+                2: {0: {'v': {insert: [(2, 3)]}}, delete: [0]},
+                4: {'id': 6},
+                insert: [(3, {'id': 5})],
+            },
+            'symmetric': {
+                0: {'id': [1, 2], 'items': {0: {'n': [1, 3]}, 1: {'n': [2, 4], delete: {'tags': ['x', 'y']}}}},
+                1: {'id': [2, 1], 'items': {0: {'n': [3, 2], insert: {'tags': ['y', 'z']}}}},
+                2: {0: {'v': {insert: [(2, 3)]}}, delete: [(0, {'k': 1})]},
+                4: {'id': [4, 6]},
+                insert: [(3, {'id': 5})],
+            },
+        }
+        for syntax in expected:
+            differ = CountingDiffer(syntax=syntax)
+            self.assertEqual(expected[syntax], differ.diff(a, b))
+            # the LCS matrix is filled with a score per pair, and only the aligned pairs are diffed, once
+            self.assertEqual({1}, set(differ.diffed.values()))
+            scored = differ.traversals - differ.diffed
+            self.assertTrue(all(scored[id(x), id(y)] == 1 for x in a for y in b if type(x) is type(y)))
+            # nested lists are scored again when their parents are diffed, unless the scores are cached
+            differ = CountingDiffer(syntax=syntax, cache_size=100)
+            self.assertEqual(expected[syntax], differ.diff(a, b))
+            self.assertEqual({1}, set(differ.diffed.values()))
+            self.assertEqual({1}, set((differ.traversals - differ.diffed).values()))
+
+    def test_public_api(self):
+        names = {}
+        exec('from jsondiff import *', names)
+        for name in ('iter_changes', 'Change', 'compile_patch', 'PatchProgram', 'diff_files', 'diff_many',
+                     'patch_many', 'adiff', 'apatch', 'asimilarity'):
+            self.assertIs(getattr(jsondiff, name), names[name])
+
+    def test_unsupported_list_algorithm(self):
+        with self.assertRaises(ValueError):
+            JsonDiffer(list_algorithm='quadratic')
+
     def test_long_arrays(self):
         size = 100
         a = [{'a': i, 'b': 2 * i} for i in range(1, size)]
@@ -149,6 +496,309 @@ class JsonDiffTests(unittest.TestCase):
         finally:
             sys.setrecursionlimit(r)
 
+    def assertChangesApply(self, a, b, changes):
+        """
+        Checks that applying the changes to a copy of a gives b, with tuples as lists.
+        """
+
+        def thaw(x):
+            if isinstance(x, dict):
+                return {k: thaw(v) for k, v in x.items()}
+            if isinstance(x, (list, tuple)):
+                return [thaw(v) for v in x]
+            return x
+
+        def at(o, path):
+            for k in path:
+                o = o[k]
+            return o
+
+        # the changes are applied shallowest first, and list deletions and insertions together before any
+        # other change at their depth, as positions in the modified list refer to the list once edited
+        root = [thaw(a)]
+        changes = sorted(changes, key=lambda c: len(c.path) + (c.op is add or c.op is discard))
+        for _, level in itertools.groupby(changes, key=lambda c: len(c.path) + (c.op is add or c.op is discard)):
+            edits = {}
+            later = []
+            for path, op, old, new in level:
+                path = (0,) + path
+                parent = path if op is add or op is discard else path[:-1]
+                o = at(root, parent)
+                if isinstance(o, list) and op is not replace:
+                    deleted, inserted = edits.setdefault(parent, ([], []))
+                    if op is delete:
+                        self.assertEqual(thaw(old), o[path[-1]])
+                        deleted.append(path[-1])
+                    else:
+                        inserted.append((path[-1], thaw(new)))
+                    continue
+                if op is add:
+                    self.assertNotIn(new, o)
+                    o.add(new)
+                elif op is discard:
+                    o.remove(old)
+                elif op is delete:
+                    self.assertEqual(thaw(old), o.pop(path[-1]))
+                else:
+                    later.append((path, op, new))
+            for parent, (deleted, inserted) in edits.items():
+                o = at(root, parent)
+                for i in sorted(deleted, reverse=True):
+                    del o[i]
+                for j, y in sorted(inserted, key=lambda item: item[0]):
+                    o.insert(j, y)
+            for path, op, new in later:
+                o = at(root, path[:-1])
+                if isinstance(o, dict):
+                    self.assertEqual(op is insert, path[-1] not in o)
+                o[path[-1]] = thaw(new)
+        self.assertEqual(thaw(b), root[0])
+
+    @given(strategies.randoms().map(generate_scenario))
+    @settings(max_examples=1000)
+    def test_iter_changes(self, scenario):
+        a, b = scenario
+        self.assertChangesApply(a, b, jsondiff.iter_changes(a, b))
+        self.assertEqual(a != b, any(True for _ in jsondiff.iter_changes(a, b)))
+
+    @given(strategies.randoms().map(generate_scenario_no_sets))
+    @settings(max_examples=1000)
+    def test_iter_changes_stream(self, scenario):
+        a, b = scenario
+
+        class Trickle(io.StringIO):
+            # reads a few characters at a time, to split values between chunks
+            def read(self, size=-1):
+                return super().read(3)
+
+        changes = list(JsonDiffer().iter_changes(Trickle(json.dumps(a)), Trickle(json.dumps(b)), stream=True))
+        self.assertChangesApply(a, b, changes)
+        self.assertEqual(json.loads(json.dumps(a)) != json.loads(json.dumps(b)), bool(changes))
+
+    def test_iter_changes_stream_out_of_step(self):
+        a = {'a': [1, 2, {'x': 1, 'y': [1]}, 3, 4, 5], 'b': 1, 'c': 2}
+        b = {'a': [1, 2, {'x': 2, 'y': [1]}, 3, 5], 'c': 2, 'b': 1, 'd': 3}
+
+        def changes(**kwargs):
+            d = JsonDiffer()
+            return list(d.iter_changes(io.StringIO(json.dumps(a)), io.StringIO(json.dumps(b)), stream=True, **kwargs))
+
+        self.assertEqual([
+            (('a', 2, 'x'), replace, 1, 2),
+            (('a', 4), delete, 4, None),
+            (('d',), insert, None, 3),
+        ], changes())
+        self.assertEqual([(('a', 4), delete, 4, None), (('d',), insert, None, 3)], changes(exclude_paths=['a.2']))
+        self.assertEqual(changes(exclude_paths=['a.2']), list(jsondiff.iter_changes(
+            io.StringIO(json.dumps(a)), io.StringIO(json.dumps(b)), exclude_paths=['a.2'], stream=True)))
+
+        # realigned on the elements read ahead, far from the ends
+        a = list(range(1000))
+        b = a[:300] + ['x'] + a[300:600] + a[602:]
+        b[800] = 'y'
+        self.assertEqual([
+            ((300,), insert, None, 'x'),
+            ((600,), delete, 600, None),
+            ((601,), delete, 601, None),
+            ((800,), replace, 801, 'y'),
+        ], changes())
+        for text in ('[1, 2', '[1 2]', '{"a" 1}', '{1: 2}', '[1] 2'):
+            with self.assertRaises(json.JSONDecodeError):
+                list(JsonDiffer().iter_changes(io.StringIO('[1, 2]'), io.StringIO(text), stream=True))
+
+    def test_write_changes(self):
+        a = {'a': [1, 2, {'x': 1}], 'b': {1, 2}, 'c': 'x', 'd': 1}
+        b = {'a': [0, 1, {'x': 2}], 'b': {2, 3}, 'c': 5, 'e': [1]}
+        fp = io.StringIO()
+        self.assertEqual(6, JsonDiffer().write_changes(a, b, fp, exclude_paths=['b']))
+        self.assertEqual([
+            {'path': ['d'], 'op': 'delete', 'old': 1},
+            {'path': ['e'], 'op': 'insert', 'new': [1]},
+            {'path': ['a', 0], 'op': 'insert', 'new': 0},
+            {'path': ['a', 1], 'op': 'delete', 'old': 2},
+            {'path': ['a', 2, 'x'], 'op': 'replace', 'old': 1, 'new': 2},
+            {'path': ['c'], 'op': 'replace', 'old': 'x', 'new': 5},
+        ], [json.loads(line) for line in fp.getvalue().splitlines()])
+
+    def test_diff_workers(self):
+        rng = random.Random(0)
+        for _ in range(10):
+            a, b = generate_scenario(rng)
+            for kwargs in ({}, {'syntax': 'symmetric', 'marshal': True}, {'list_algorithm': 'hirschberg'}):
+                expected = JsonDiffer(**kwargs).diff(a, b)
+                self.assertEqual(expected, JsonDiffer(parallel_threshold=1, **kwargs).diff(a, b, workers=2))
+        a = [{'id': i, 'v': [i, i + 1]} for i in range(20)]
+        b = [dict(x, v=[0]) if x['id'] % 7 == 0 else x for x in reversed(a)]
+        for list_keys in ('id', lambda x: x['id'], None):
+            self.assertEqual(diff(a, b, list_keys=list_keys),
+                             diff(a, b, list_keys=list_keys, workers=2, parallel_threshold=1))
+
+    def test_diff_workers_below_threshold(self):
+        a = [{'id': i, 'v': [i, i + 1]} for i in range(31)]
+        b = [dict(x, v=[i]) for i, x in enumerate(reversed(a))]
+        for x, y in ((a, b), (dict(enumerate(a)), dict(enumerate(b)))):
+            serial = CountingDiffer()
+            expected = serial.diff(x, y)
+            differ = CountingDiffer()
+            with unittest.mock.patch('concurrent.futures.ProcessPoolExecutor', side_effect=AssertionError):
+                self.assertEqual(expected, differ.diff(x, y, workers=2))
+            self.assertEqual(serial.traversals, differ.traversals)
+
+    def test_diff_many(self):
+        rng = random.Random(1)
+        pairs = [generate_scenario(rng) for _ in range(40)]
+        differ = JsonDiffer(syntax='symmetric', marshal=True)
+        expected = [differ.diff(a, b, exclude_paths=['x']) for a, b in pairs]
+        self.assertEqual(expected, list(differ.diff_many(pairs, exclude_paths=['x'], chunksize=3)))
+        for pool in (concurrent.futures.ThreadPoolExecutor(4), concurrent.futures.ProcessPoolExecutor(2)):
+            with pool:
+                diffs = differ.diff_many(iter(pairs), exclude_paths=['x'], executor=pool, chunksize=3)
+                self.assertEqual(expected, list(diffs))
+                diffs = differ.diff_many(pairs, exclude_paths=['x'], executor=pool, chunksize=3, ordered=False)
+                self.assertEqual(expected, [d for i, d in sorted(diffs, key=lambda x: x[0])])
+                patched = differ.patch_many(((a, d) for (a, b), d in zip(pairs, expected)), executor=pool)
+                self.assertEqual([differ.patch(a, d) for (a, b), d in zip(pairs, expected)], list(patched))
+        self.assertEqual([diff(a, b) for a, b in pairs], list(diff_many(pairs)))
+        self.assertEqual([], list(patch_many([])))
+
+    def test_async(self):
+        rng = random.Random(2)
+        for _ in range(20):
+            a, b = generate_scenario(rng)
+            for kwargs in ({}, {'syntax': 'symmetric', 'marshal': True}, {'list_algorithm': 'hirschberg'}):
+                differ = JsonDiffer(**kwargs)
+                d = asyncio.run(differ.adiff(a, b, yield_every=1))
+                self.assertEqual(differ.diff(a, b), d)
+                self.assertEqual(differ.similarity(a, b), asyncio.run(differ.asimilarity(a, b, time_slice=0)))
+                self.assertEqual(differ.patch(a, d), asyncio.run(differ.apatch(a, d)))
+
+        async def ticking(coro):
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            task = asyncio.ensure_future(tick())
+            try:
+                return await coro, ticks
+            finally:
+                task.cancel()
+
+        a = [{'id': i, 'v': [i, i + 1]} for i in range(200)]
+        b = [dict(x, v=[0]) if x['id'] % 7 == 0 else x for x in reversed(a)]
+        d, ticks = asyncio.run(ticking(jsondiff.adiff(a, b, yield_every=10)))
+        self.assertEqual(diff(a, b), d)
+        self.assertGreater(ticks, 10)
+        self.assertEqual(similarity(a, b), asyncio.run(jsondiff.asimilarity(a, b)))
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            self.assertEqual(d, asyncio.run(jsondiff.adiff(a, b, executor=pool)))
+            self.assertEqual(b, asyncio.run(jsondiff.apatch(a, d, executor=pool)))
+        deep_a, deep_b = [0], [1]
+        for _ in range(2000):
+            deep_a, deep_b = [deep_a], [deep_b]
+        self.assertEqual(diff(deep_a, deep_b), asyncio.run(jsondiff.adiff(deep_a, deep_b)))
+
+    def write_files(self, a, b):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        paths = []
+        for name, text in (('a.json', a), ('b.json', b)):
+            paths.append(os.path.join(tmp.name, name))
+            with open(paths[-1], 'w') as f:
+                f.write(text)
+        return paths
+
+    @given(strategies.randoms().map(generate_scenario_no_sets), strategies.sampled_from([None, 1]))
+    @settings(max_examples=500, deadline=None)
+    def test_diff_files(self, scenario, indent):
+        a, b = (json.loads(json.dumps(x)) for x in scenario)
+        differ = JsonDiffer(syntax='symmetric', marshal=True)
+        d = differ.diff_files(*self.write_files(json.dumps(a, indent=indent), json.dumps(b, indent=indent)))
+        self.assertEqual(b, differ.patch(a, d))
+        self.assertEqual(a, differ.unpatch(b, d))
+
+    def test_diff_files_skips_shared_items(self):
+        a = {f'k{i}': {'v': [i, str(i)]} for i in range(100)}
+        b = dict(a, k10={'v': -1}, k90=1)
+        differ = JsonDiffer()
+        paths = self.write_files(json.dumps(a), json.dumps(b))
+        self.assertEqual({'k10': {'v': -1}, 'k90': 1}, differ.diff_files(*paths))
+        self.assertEqual(4, differ.items_parsed)
+        self.assertEqual(196, differ.items_skipped)
+        self.assertEqual(len('{"v": [10, "10"]}{"v": [90, "90"]}{"v": -1}1'), differ.bytes_parsed)
+
+        a = list(range(100))
+        b = a[:30] + ['x'] + a[31:60] + a[61:]
+        paths = self.write_files(json.dumps(a), json.dumps(b))
+        self.assertEqual({insert: [(30, 'x')], delete: [60, 30]}, differ.diff_files(*paths))
+        self.assertEqual(3, differ.items_parsed)
+
+        # identical files are not parsed
+        self.assertEqual({}, differ.diff_files(*self.write_files('[1, [2', '[1, [2')))
+        self.assertEqual(0, differ.bytes_parsed)
+
+        # items sharing only their first bytes, repeated keys, keyed lists and syntaxes emitting whole documents
+        self.assertEqual([123], differ.diff_files(*self.write_files('[12, 3]', '[123]')))
+        self.assertEqual({'a': 3}, differ.diff_files(*self.write_files('{"a": 1, "b": 2}', '{"a": 1, "b": 2, "a": 3}')))
+        self.assertEqual({insert: [(0, {'id': 2})]}, JsonDiffer(list_keys='id').diff_files(
+            *self.write_files('[{"id": 1}, {"id": 3}]', '[{"id": 2}, {"id": 1}, {"id": 3}]')))
+        paths = self.write_files('[1, 2, 3]', '[1, 5, 3]')
+        self.assertEqual([1, 5, 3], JsonDiffer(syntax='rightonly').diff_files(*paths))
+        # custom loaders are given str
+        loader = lambda s: json.loads(s, parse_int=str)
+        paths = self.write_files('{"a": [1], "b": 2}', '{"a": [1], "b": 3}')
+        self.assertEqual({'b': '3'}, JsonDiffer(loader=loader).diff_files(*paths))
+        self.assertEqual({'b': 3}, JsonDiffer(loader=jsondiff.JsonLoader('json')).diff_files(*paths))
+
+        for text in ('[1, 2', '[1 2]', '[1, 2,]', '{"a" 1}', '[1] 2', '["1, 2]', ''):
+            with self.assertRaises(ValueError):
+                differ.diff_files(*self.write_files('[1, 2]', text))
+
+    def test_deep_change_rounds_score(self):
+        def nested(leaf):
+            o = leaf
+            for i in range(60):
+                o = {'k': o} if i % 2 else [o, 'x']
+            return o
+
+        a = nested(1)
+        b = nested(2)
+        # the score of a change this deep rounds up to 1.0, yet it is kept in the diff
+        self.assertEqual(1.0, similarity(a, b))
+        self.assertTrue(diff(a, b, syntax='explicit'))
+        for syntax in ('compact', 'symmetric'):
+            differ = JsonDiffer(syntax=syntax)
+            self.assertEqual(b, differ.patch(a, differ.diff(a, b)))
+        self.assertEqual(a, JsonDiffer(syntax='symmetric').unpatch(b, diff(a, b, syntax='symmetric')))
+
+    def test_deeply_nested(self):
+        depth = 3 * sys.getrecursionlimit()
+
+        def nested(leaf):
+            o = {'leaf': leaf, '$key': ('$value',)}
+            for i in range(depth):
+                o = {'level': i * leaf, 'child': o} if i % 2 else [o, '$escaped']
+            return o
+
+        def innermost(o):
+            for i in range(depth):
+                o = o['child'] if isinstance(o, dict) else o[0]
+            return o
+
+        a = nested(1)
+        b = nested(2)
+        self.assertEqual(2, innermost(jsondiff.patch(a, diff(a, b)))['leaf'])
+        differ = JsonDiffer(syntax='symmetric', marshal=True)
+        d = differ.diff(a, b)
+        self.assertEqual(2, innermost(differ.patch(a, d))['leaf'])
+        self.assertEqual(1, innermost(differ.unpatch(b, d))['leaf'])
+        self.assertEqual({'leaf': 1, '$$key': ('$$value',)}, innermost(differ.marshal(a)))
+        self.assertEqual({'leaf': 1, '$key': ('$value',)}, innermost(differ.unmarshal(differ.marshal(a))))
+        self.assertIsNotNone(jsondiff.similarity(a, b))
+
 
 @pytest.mark.parametrize(
     ("a", "b", "syntax", "expected"),
@@ -232,6 +882,49 @@ class TestLoaders(unittest.TestCase):
             actual = loader(f)
         self.assertEqual(expected, actual)
 
+    def test_json_backends(self):
+        self.assertIn('json', jsondiff.json_backends)
+        self.assertIn(jsondiff.default_json_backend, jsondiff.json_backends)
+        # faster backends are opt-in
+        self.assertIs(jsondiff.json_backends['json'], jsondiff.JsonLoader().backend)
+        self.assertIs(jsondiff.json_backends['json'], jsondiff.default_loader.backend)
+        loader, dumper = jsondiff.Serializer('json', None).serializers['json']
+        self.assertEqual(('json', 'json'), (loader.backend.name, dumper.backend.name))
+        self.assertIs(jsondiff.json_backends[jsondiff.default_json_backend], jsondiff.JsonLoader(None).backend)
+        docs = ['{"hello": "w\\u00f6rld", "data": [1, 2.5e-7, null, true]}', '[123456789012345678901234567890]',
+                '{"a": -123456789012345678901234567890, "b": 0.000123456789012345678901}', '123456789012345678901',
+                '-9999999999999999999', '[-9223372036854775809, 9223372036854775807, 18446744073709551615]',
+                '[NaN, 1e400]', '{"a": {}, "b": []}']
+        for name in jsondiff.json_backends:
+            loader = jsondiff.JsonLoader(name)
+            for doc in docs:
+                self.assertEqual(json.dumps(json.loads(doc)), json.dumps(loader(doc)))
+                self.assertEqual(json.dumps(json.loads(doc)), json.dumps(loader(doc.encode())))
+                self.assertEqual(json.dumps(json.loads(doc)), json.dumps(loader(io.BytesIO(doc.encode()))))
+            with self.assertRaises(ValueError):
+                loader('[1, 2')
+            data = {"hello": "wörld", "data": [1.5, None], "nested": {"$insert": [[0, "x"]]}}
+            for kwargs in ({}, {'indent': 2}, {'indent': 4, 'sort_keys': True}):
+                self.assertEqual(data, json.loads(jsondiff.JsonDumper(name, **kwargs)(data)))
+            self.assertEqual({'1': 2}, json.loads(jsondiff.JsonDumper(name)({1: 2})))
+            differ = JsonDiffer(load=True, loader=loader)
+            self.assertEqual({'a': 2}, differ.diff('{"a": 1}', b'{"a": 2}'))
+        with self.assertRaises(ValueError):
+            jsondiff.JsonLoader('nope')
+
+    def test_register_json_backend(self):
+        class Backend(jsondiff.JsonBackend):
+            name = 'test'
+
+            def loads(self, s, **kwargs):
+                return {'loaded': super().loads(s, **kwargs)}
+
+        jsondiff.register_json_backend(Backend())
+        self.addCleanup(jsondiff.json_backends.pop, 'test')
+        self.assertEqual({'loaded': [1]}, jsondiff.Serializer('json', None, 'test').deserialize_file(io.StringIO('[1]')))
+        with self.assertRaises(ValueError):
+            jsondiff.Serializer('json', None, 'test').deserialize_file(io.StringIO('[1'))
+
     def test_yaml_string_loader(self):
         json_str = """---
 hello: world
@@ -245,6 +938,38 @@ data:
         actual = loader(json_str)
         self.assertEqual(expected, actual)
 
+    def test_yaml_implementations(self):
+        self.assertIn(jsondiff.yaml_implementation, ('libyaml', 'python'))
+        self.assertEqual(jsondiff.yaml_implementation, jsondiff.YamlLoader().implementation)
+        self.assertEqual(jsondiff.yaml_implementation, jsondiff.YamlDumper().implementation)
+        yaml_file = os.path.join(TestLoaders.data_dir, "test_01.yaml")
+        data = {"hello": "world", "data": [1, 2.5, None, True, "x: y"], "nested": {"a": [{"b": "c"}]}}
+        implementations = [False] + ([True] if jsondiff.yaml_implementation == 'libyaml' else [])
+        for libyaml in implementations:
+            with open(yaml_file) as f:
+                self.assertEqual({"hello": "world", "data": [1, 2, 3]}, jsondiff.YamlLoader(libyaml)(f))
+            dumped = jsondiff.YamlDumper(libyaml, sort_keys=True)(data)
+            self.assertEqual(jsondiff.YamlDumper(False, sort_keys=True)(data), dumped)
+            self.assertEqual(data, jsondiff.YamlLoader(libyaml)(dumped))
+
+    def test_yaml_multi_document_loader(self):
+        stream = "a: 1\n---\nb: [2, 3]\n---\n- 4\n"
+        docs = [{"a": 1}, {"b": [2, 3]}, [4]]
+        self.assertEqual(docs, list(jsondiff.YamlLoader().iter_documents(io.StringIO(stream))))
+        self.assertEqual(docs, jsondiff.YamlLoader(multi_document=True)(stream))
+        self.assertEqual([{"a": 1}], jsondiff.YamlLoader(multi_document=True)("a: 1"))
+        self.assertEqual([], jsondiff.YamlLoader(multi_document=True)(""))
+        self.assertIsNone(jsondiff.YamlLoader()(""))
+        self.assertIsNone(jsondiff.Serializer("yaml", None).deserialize_file(io.StringIO("")))
+        self.assertEqual(docs, jsondiff.Serializer("yaml", None, multi_document=True).deserialize_file(stream))
+        self.assertEqual([[4]], jsondiff.Serializer("yaml", None, multi_document=True).deserialize_file("- 4\n"))
+        with self.assertRaises(ValueError):
+            jsondiff.Serializer("yaml", None, multi_document=True).deserialize_file(io.StringIO("a: 1\n---\n[b"))
+        with self.assertRaises(ValueError):
+            jsondiff.Serializer("yaml", None).deserialize_file(io.StringIO(stream))
+        with self.assertRaises(yaml.YAMLError):
+            jsondiff.YamlLoader()(stream)
+
     def test_yaml_file_loader(self):
         yaml_file = os.path.join(TestLoaders.data_dir, "test_01.yaml")
         expected = {"hello": "world", "data": [1, 2, 3]}
@@ -331,3 +1056,24 @@ hello: world
 
         # The diff should only contain changes that are not in the exclude_paths
         self.assertEqual({'b': {'b2': 23}}, d)
+
+    def test_exclude_paths_wildcards_and_lists(self):
+        a = {'items': [{'id': 1, 'ts': 5}, {'id': 2, 'ts': 6, 'v': 2}], 'meta': {'ts': 1, 'x': {'ts': 3}}}
+        b = {'items': [{'id': 1, 'ts': 7}, {'id': 2, 'ts': 8, 'v': 3}], 'meta': {'ts': 2, 'x': {'ts': 4}}}
+
+        self.assertEqual({'items': {1: {'v': 3}}, 'meta': {'ts': 2}}, diff(a, b, exclude_paths=['items.*.ts', 'meta.*.ts']))
+        self.assertEqual(
+            {'items': {1: {'ts': 8, 'v': 3}}, 'meta': {'x': {'ts': 4}}},
+            diff(a, b, exclude_paths=['items.0.ts', 'meta.ts'])
+        )
+        self.assertEqual({}, diff(a, b, exclude_paths=['*']))
+
+    def test_exclude_paths_dotted_and_star_keys(self):
+        # keys holding dots are matched as the dotted strings of the keys leading to them
+        self.assertEqual({'c': 3}, diff({'a.b': 1, 'c': 2}, {'a.b': 2, 'c': 3}, exclude_paths=['a.b']))
+        self.assertEqual({'c': 3}, diff({'x': {'a.b': 1}, 'c': 2}, {'x': {'a.b': 2}, 'c': 3}, exclude_paths=['x.a.b']))
+        self.assertEqual({'c': 3}, diff({'a': {'b': 1}, 'c': 2}, {'a': {'b': 2}, 'c': 3}, exclude_paths=['a.b']))
+        self.assertEqual({'a.c': 2}, diff({'a.b': 1, 'a.c': 1}, {'a.b': 2, 'a.c': 2}, exclude_paths=['*.b']))
+        # '\\*' matches a '*' key only
+        self.assertEqual({'c': 3}, diff({'*': 1, 'c': 2}, {'*': 2, 'c': 3}, exclude_paths=['\\*']))
+        self.assertEqual({}, diff({'*': 1, 'c': 2}, {'*': 2, 'c': 3}, exclude_paths=['*']))